@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+
+from olymper import compile_cache
+from olymper import compression
+from olymper.misc import pjoin
+
+__author__ = 'ksg'
+
+MANIFEST_VERSION = 1
+
+
+def hash_test_file(path):
+    """md5 of content of the file, compressed file is hashed decompressed, so compressing doesn't change it"""
+    if not os.path.exists(path):
+        return None
+    if not compression.get_suffix(path):
+        return compile_cache.hash_file(path).hexdigest()
+
+    md5 = hashlib.md5()
+    with compression.open_read(path) as f:
+        for chunk in iter(lambda: f.read(compression.CHUNK_SIZE), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+class BuildManifest:
+    """state of the last tests build for incremental rebuilding
+
+    Stores build key of the generator and for every test hash of input and answer together with build keys
+    of the validator and the main solution which have successfully processed this input.
+    """
+
+    def __init__(self, path=pjoin('tmp', 'build_manifest.json')):
+        self.path = path
+        self.data = {}
+        try:
+            with open(path) as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):  # no previous build or broken manifest, everything will be rebuilt
+            pass
+        if self.data.get('version') != MANIFEST_VERSION:
+            self.reset()
+
+    def reset(self):
+        self.data = {'version': MANIFEST_VERSION, 'gen': None, 'tests': {}}
+
+    @property
+    def gen_key(self):
+        return self.data['gen']
+
+    @gen_key.setter
+    def gen_key(self, key):
+        self.data['gen'] = key
+
+    def get_test(self, name):
+        return self.data['tests'].setdefault(name, {})
+
+    def get_inputs(self):
+        """returns {test name: input hash} of the last build"""
+        return {name: record.get('inf') for name, record in self.data['tests'].items()}
+
+    def update_inputs(self, inputs):
+        """takes {test name: input hash} of current tests, forgets everything known about changed inputs"""
+        tests = {}
+        for name, inf_hash in inputs.items():
+            record = self.data['tests'].get(name, {})
+            tests[name] = record if record.get('inf') == inf_hash else {'inf': inf_hash}
+        self.data['tests'] = tests
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,121 @@
+import collections
+import hashlib
+import json
+import os
+import threading
+
+from olymper.executable import ExecResult
+from olymper.misc import pjoin
+
+__author__ = 'ksg'
+
+MAX_HISTORY_SOLUTIONS = 100
+MAX_VERDICTS = 100000
+
+
+class TestResult(collections.namedtuple('TestResult', ['score', 'status', 'msg', 'time', 'sol_res', 'output_size',
+                                                       'cached', 'timings'])):
+    """result of checking solution on a single test, sol_res is ExecResult of the solution (None if it wasn't run)
+
+    output_size is in bytes, timings are wall times of repeated runs.
+    """
+    __slots__ = ()
+
+    def __new__(cls, score, status, msg, time=0, sol_res=None, output_size=None, cached=False, timings=None):
+        return super().__new__(cls, score, status, msg, time, sol_res, output_size, cached, timings)
+
+
+def load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):  # nothing saved yet or broken file
+        return default
+
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class FailureHistory:
+    """names of tests failed by every solution (identified by its build key) on the last check"""
+
+    def __init__(self, path=pjoin('tmp', 'failure_history.json')):
+        self.path = path
+        self.data = load_json(path, {})
+
+    def get_failed(self, solution_key):
+        return set(self.data.get(solution_key, []))
+
+    def order_tests(self, solution_key, tests):
+        """moves tests failed last time to the beginning, keeps order of others"""
+        failed = self.get_failed(solution_key)
+        return sorted(tests, key=lambda t: t.inf_name() not in failed)
+
+    def update(self, solution_key, results):
+        """takes {test name: passed} of tests run now, tests which weren't run keep their state"""
+        failed = self.get_failed(solution_key)
+        for name, passed in results.items():
+            if passed:
+                failed.discard(name)
+            else:
+                failed.add(name)
+
+        # the most recently checked solutions are kept at the end
+        self.data.pop(solution_key, None)
+        self.data[solution_key] = sorted(failed)
+        while len(self.data) > MAX_HISTORY_SOLUTIONS:
+            del self.data[next(iter(self.data))]
+
+    def save(self):
+        save_json(self.path, self.data)
+
+
+def get_verdict_key(*parts):
+    """key of a single check, parts are build keys, hashes of test files and limits"""
+    md5 = hashlib.md5()
+    for x in parts:
+        md5.update(str(x).encode('utf-8') + b'\0')
+    return md5.hexdigest()
+
+
+class VerdictCache:
+    """verdicts of solutions on tests with times and resource usage of the runs, can be used from several threads"""
+
+    def __init__(self, path=pjoin('tmp', 'verdict_cache.json')):
+        self.path = path
+        self.data = load_json(path, {})
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """returns TestResult or None"""
+        with self.lock:
+            entry = self.data.get(key)
+        if entry is None:
+            return None
+        sol_res = ExecResult(entry['returncode'], entry['time'], None, None, entry['user_time'], entry['sys_time'],
+                             entry['max_rss'])
+        return TestResult(entry['score'], entry['status'], entry['msg'], entry['time'], sol_res,
+                          entry.get('output_size'), cached=True)
+
+    def put(self, key, result):
+        entry = {'score': result.score, 'status': result.status, 'msg': result.msg, 'time': result.time,
+                 'output_size': result.output_size,
+                 'returncode': None, 'user_time': None, 'sys_time': None, 'max_rss': None}
+        sol_res = result.sol_res
+        if sol_res is not None:
+            entry.update(returncode=sol_res.returncode, user_time=sol_res.user_time, sys_time=sol_res.sys_time,
+                         max_rss=sol_res.max_rss)
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = entry
+            while len(self.data) > MAX_VERDICTS:
+                del self.data[next(iter(self.data))]
+
+    def save(self):
+        with self.lock:
+            save_json(self.path, self.data)
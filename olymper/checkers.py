@@ -0,0 +1,206 @@
+import contextlib
+import itertools
+import math
+import mmap
+import os
+import re
+import time
+
+from olymper.executable import ExecResult
+from olymper.executable import split_args
+
+__author__ = 'ksg'
+
+BUILTIN_PREFIX = 'builtin:'
+DEFAULT_EPS = 1e-6
+
+# testlib exit codes
+OK = 0
+WA = 1
+PE = 2
+FAIL = 3
+
+TOKEN_RE = re.compile(rb'\S+')
+MAX_SHOWN_TOKEN = 64
+
+
+class CheckerResult(Exception):
+    def __init__(self, returncode, msg):
+        self.returncode = returncode
+        self.msg = msg
+
+
+def is_builtin(checker):
+    return checker.startswith(BUILTIN_PREFIX)
+
+
+def english_ending(n):
+    if n % 100 // 10 != 1 and n % 10 in (1, 2, 3):
+        return '{0}{1}'.format(n, ('st', 'nd', 'rd')[n % 10 - 1])
+    return '{0}th'.format(n)
+
+
+def shorten(token):
+    token = str(token, 'utf-8', 'replace')
+    if len(token) > MAX_SHOWN_TOKEN:
+        token = token[:MAX_SHOWN_TOKEN // 2] + '...' + token[-MAX_SHOWN_TOKEN // 2:]
+    return token
+
+
+@contextlib.contextmanager
+def open_mapped(path, role):
+    """maps file into memory, so only the scanned part of it is loaded"""
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+    except OSError as e:
+        raise CheckerResult(FAIL, 'Can\'t open {0} file: {1}'.format(role, e))
+
+    # mapping isn't closed explicitly, regex iterators in tracebacks of mismatches still can use it
+    yield mapped if mapped is not None else b''  # empty files can't be mapped
+
+
+def iter_tokens(data):
+    return (match.group() for match in TOKEN_RE.finditer(data))
+
+
+def iter_lines(data):
+    """yields lines as lists of tokens, trailing empty lines are skipped"""
+    empty_lines = 0
+    start = 0
+    while start < len(data):
+        end = data.find(b'\n', start)
+        if end == -1:
+            end = len(data)
+        tokens = TOKEN_RE.findall(data, start, end)
+        if tokens:
+            for i in range(empty_lines):
+                yield []
+            empty_lines = 0
+            yield tokens
+        else:
+            empty_lines += 1
+        start = end + 1
+
+
+def compare_tokens(out, ans, eq=None, name='tokens'):
+    n = 0
+    out_tokens = iter_tokens(out)
+    ans_tokens = iter_tokens(ans)
+    for x, y in itertools.zip_longest(ans_tokens, out_tokens):
+        if x is None:
+            raise CheckerResult(WA, 'Output contains longer sequence [length = {0}], '
+                                    'but answer contains {1} elements'.format(n + 1 + count(out_tokens), n))
+        if y is None:
+            raise CheckerResult(WA, 'Answer contains longer sequence [length = {0}], '
+                                    'but output contains {1} elements'.format(n + 1 + count(ans_tokens), n))
+        n += 1
+        if eq is not None:
+            eq(n, x, y)
+        elif x != y:
+            raise CheckerResult(WA, '{0} {1} differ - expected: \'{2}\', found: \'{3}\''.format(
+                english_ending(n), name, shorten(x), shorten(y)))
+    return 'ok {0} {1}'.format(n, name)
+
+
+def compare_lines(out, ans):
+    n = 0
+    out_lines = iter_lines(out)
+    ans_lines = iter_lines(ans)
+    for x, y in itertools.zip_longest(ans_lines, out_lines):
+        if x is None or y is None:
+            ans_len = n + (x is not None) + count(ans_lines)
+            out_len = n + (y is not None) + count(out_lines)
+            raise CheckerResult(WA, 'Lines count differ - expected: {0}, found: {1}'.format(ans_len, out_len))
+        n += 1
+        if x != y:
+            raise CheckerResult(WA, '{0} lines differ - expected: \'{1}\', found: \'{2}\''.format(
+                english_ending(n), shorten(b' '.join(x)), shorten(b' '.join(y))))
+    return 'ok {0} lines'.format(n)
+
+
+def count(iterator):
+    return sum(1 for x in iterator)
+
+
+def parse_double(token, role, n):
+    try:
+        res = float(token)
+    except ValueError:
+        res = math.nan
+    if math.isnan(res) and token.lower() != b'nan':
+        raise CheckerResult(PE if role == 'output' else FAIL, 'Expected double, but \'{0}\' found in {1} ({2} '
+                                                              'token)'.format(shorten(token), role, english_ending(n)))
+    return res
+
+
+def make_double_eq(eps):
+    def eq(n, x, y):
+        expected = parse_double(x, 'answer', n)
+        found = parse_double(y, 'output', n)
+        if math.isnan(expected) or math.isinf(expected):
+            equal = str(expected) == str(found)
+        else:
+            # absolute or relative error, like doubleCompare() of testlib
+            equal = abs(found - expected) <= eps + 1e-15 or \
+                abs(found - expected) <= eps * abs(expected) + 1e-15
+        if not equal:
+            raise CheckerResult(WA, '{0} numbers differ - expected: \'{1}\', found: \'{2}\', '
+                                    'error = \'{3:.9f}\''.format(english_ending(n), shorten(x), shorten(y),
+                                                                abs(found - expected)))
+
+    return eq
+
+
+class BuiltinChecker:
+    """comparator run inside olymper instead of a compiled checker, spec is like 'builtin:double:1e-6'
+
+    Can be used instead of Executable of a checker: execute() takes the same paths of input, output and answer
+    and returns ExecResult with testlib exit code and message in stderr.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.target = 'checker'
+        self.compiled = True
+
+        params = spec[len(BUILTIN_PREFIX):].split(':')
+        self.kind = params[0]
+        if self.kind == 'tokens' and len(params) == 1:
+            self.compare = compare_tokens
+        elif self.kind == 'lines' and len(params) == 1:
+            self.compare = compare_lines
+        elif self.kind == 'double' and len(params) <= 2:
+            try:
+                eps = float(params[1]) if len(params) == 2 else DEFAULT_EPS
+            except ValueError:
+                raise Exception('Wrong precision of builtin checker ({0})'.format(spec))
+            eq = make_double_eq(eps)
+            self.compare = lambda out, ans: compare_tokens(out, ans, eq, 'numbers')
+        else:
+            raise Exception('Unknown builtin checker ({0}), use builtin:tokens, builtin:lines '
+                            'or builtin:double[:eps]'.format(spec))
+
+    def finish_compilation(self):
+        pass
+
+    def get_build_key(self):
+        return self.spec
+
+    def check(self, out_path, ans_path):
+        """returns testlib exit code and message"""
+        try:
+            with open_mapped(out_path, 'output') as out, open_mapped(ans_path, 'answer') as ans:
+                return OK, self.compare(out, ans)
+        except CheckerResult as res:
+            return res.returncode, res.msg
+
+    def execute(self, stdin=None, stdout=None, stderr=None, tl=None, args='', pass_fds=()):
+        start_time = time.monotonic()
+        inf_path, out_path, ans_path = split_args(args)[:3]
+        returncode, msg = self.check(out_path, ans_path)
+        if returncode in (WA, PE):
+            msg = ('wrong answer ' if returncode == WA else 'wrong output format ') + msg
+        elif returncode == FAIL:
+            msg = 'FAIL ' + msg
+        return ExecResult(returncode, time.monotonic() - start_time, None, msg.encode('utf-8'))
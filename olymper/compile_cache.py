@@ -0,0 +1,192 @@
+import hashlib
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from olymper.misc import pjoin
+
+__author__ = 'ksg'
+
+DEFAULT_CACHE_SIZE = 1024  # in MB
+
+_toolchain_versions = {}
+_pch_lock = threading.Lock()
+
+
+def get_cache_dir():
+    """shared cache folder, '~/.cache/olymper' by default"""
+    if os.environ.get('OLYMPER_CACHE_DIR'):
+        return os.environ['OLYMPER_CACHE_DIR']
+    return pjoin(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(pjoin('~', '.cache')), 'olymper')
+
+
+def get_toolchain_version(cmd):
+    """returns output of the version command (like ['g++', '--version']), computed once per process"""
+    cmd = tuple(cmd)
+    if cmd not in _toolchain_versions:
+        try:
+            res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            _toolchain_versions[cmd] = str(res.stdout, 'utf-8', 'replace').strip()
+        except OSError:  # toolchain isn't installed, compilation will fail anyway
+            _toolchain_versions[cmd] = ''
+    return _toolchain_versions[cmd]
+
+
+def hash_file(path, md5=None):
+    md5 = md5 or hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            md5.update(chunk)
+    return md5
+
+
+def hash_folder(path, md5=None):
+    """hashes names and content of all files in folder (like 'lib' with testlib.h)"""
+    md5 = md5 or hashlib.md5()
+    if not os.path.isdir(path):
+        return md5
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = pjoin(root, name)
+            md5.update(os.path.relpath(file_path, path).encode('utf-8') + b'\0')
+            hash_file(file_path, md5)
+    return md5
+
+
+def get_key(src_path, lang, flags, toolchain_version, include_dirs=()):
+    md5 = hashlib.md5()
+    for x in (lang, flags, toolchain_version):
+        md5.update(x.encode('utf-8') + b'\0')
+    hash_file(src_path, md5)
+    for include_dir in include_dirs:
+        md5.update(b'\0')
+        hash_folder(include_dir, md5)
+    return md5.hexdigest()
+
+
+class CompileCache:
+    """content-addressed storage of compiled binaries (or folders with classes for Java) with LRU eviction"""
+
+    def __init__(self, path=None, max_size=None):
+        self.path = path or pjoin(get_cache_dir(), 'bin')
+        max_size = max_size or os.environ.get('OLYMPER_CACHE_SIZE') or DEFAULT_CACHE_SIZE
+        self.max_size = int(max_size) * 1024 ** 2
+
+    def entry_path(self, key):
+        return pjoin(self.path, key[:2], key)
+
+    def fetch(self, key, dest):
+        entry = self.entry_path(key)
+        if not os.path.exists(entry):
+            return False
+
+        try:
+            if os.path.isdir(entry):
+                shutil.copytree(entry, dest, dirs_exist_ok=True)
+            else:
+                # dest may be running right now, so it is replaced instead of being overwritten
+                tmp_dest = '{0}.{1}-{2}.tmp'.format(dest, os.getpid(), threading.get_ident())
+                shutil.copy2(entry, tmp_dest)
+                os.replace(tmp_dest, dest)
+            os.utime(entry)  # mtime is used as last access time for eviction
+        except OSError:  # entry was evicted by another process
+            return False
+        return True
+
+    def store(self, key, src):
+        entry = self.entry_path(key)
+        if os.path.exists(entry):
+            os.utime(entry)
+            return
+
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # copy to a temporary place first, so other processes never see half-written entries
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(entry))
+        try:
+            tmp_entry = pjoin(tmp_dir, key)
+            if os.path.isdir(src):
+                shutil.copytree(src, tmp_entry)
+            else:
+                shutil.copy2(src, tmp_entry)
+            os.rename(tmp_entry, entry)
+        except OSError:  # the same entry was stored concurrently
+            pass
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.evict()
+
+    def evict(self):
+        entries = []
+        total_size = 0
+        if not os.path.isdir(self.path):
+            return
+
+        for prefix in os.listdir(self.path):
+            for key in os.listdir(pjoin(self.path, prefix)):
+                entry = pjoin(self.path, prefix, key)
+                if key.startswith('.tmp-'):
+                    continue
+                try:
+                    size = self.get_size(entry)
+                    entries.append((os.path.getmtime(entry), size, entry))
+                except OSError:  # removed by another process
+                    continue
+                total_size += size
+
+        entries.sort()
+        for mtime, size, entry in entries:
+            if total_size <= self.max_size:
+                break
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            elif os.path.exists(entry):
+                os.remove(entry)
+            total_size -= size
+
+    @staticmethod
+    def get_size(path):
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+        return sum(os.path.getsize(pjoin(root, name)) for root, dirs, files in os.walk(path) for name in files)
+
+
+def get_pch_cache():
+    return CompileCache(pjoin(get_cache_dir(), 'pch'))
+
+
+def get_pch_key(header_path, flags, toolchain_version):
+    md5 = hashlib.md5()
+    for x in ('pch', flags, toolchain_version):
+        md5.update(x.encode('utf-8') + b'\0')
+    hash_file(header_path, md5)
+    return md5.hexdigest()
+
+
+def build_pch(cache, key, header_path, flags, compiler='g++'):
+    """builds '<header>.gch' into cache entry, which can be passed to compiler with -I before the header folder"""
+    with _pch_lock:
+        entry = cache.entry_path(key)
+        if os.path.exists(entry):
+            os.utime(entry)
+            return True
+
+        # gcc doesn't switch to header mode if language was already set (like '-xc++' in default flags)
+        flags = re.sub(r'(^|\s)-x\s*\S+', ' ', flags)
+
+        tmp_dir = tempfile.mkdtemp(prefix='olymper-pch-')
+        try:
+            gch_path = pjoin(tmp_dir, os.path.basename(header_path) + '.gch')
+            res = subprocess.run([compiler] + shlex.split(flags) + ['-x', 'c++-header', header_path, '-o', gch_path],
+                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if res.returncode != 0:
+                return False
+            cache.store(key, tmp_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return True
@@ -0,0 +1,176 @@
+import contextlib
+import filecmp
+import gzip
+import os
+import shutil
+import subprocess
+import threading
+
+__author__ = 'ksg'
+
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+CHUNK_SIZE = 1 << 20
+
+try:
+    # noinspection PyUnresolvedReferences
+    import zstandard  # optional, zstd utility is used without it
+except ImportError:
+    zstandard = None
+
+
+def get_suffix(path):
+    """returns '.gz' or '.zst' for compressed files, '' otherwise"""
+    for suffix in COMPRESSED_SUFFIXES:
+        if path.endswith(suffix):
+            return suffix
+    return ''
+
+
+def find_file(path):
+    """returns path of existing plain or compressed version of the file, the path itself if there is no one"""
+    for suffix in ('',) + COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            return path + suffix
+    return path
+
+
+def remove_variants(path):
+    """removes plain and compressed versions of the file"""
+    for suffix in ('',) + COMPRESSED_SUFFIXES:
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def get_zstd():
+    zstd = shutil.which('zstd')
+    if zstd is None:
+        raise Exception('Can\'t process .zst files: neither zstandard module nor zstd utility is installed')
+    return zstd
+
+
+@contextlib.contextmanager
+def open_read(path):
+    """binary file object with decompressed content of the file"""
+    suffix = get_suffix(path)
+    if suffix == '.gz':
+        with gzip.open(path, 'rb') as f:
+            yield f
+    elif suffix == '.zst' and zstandard is not None:
+        with open(path, 'rb') as compressed, zstandard.ZstdDecompressor().stream_reader(compressed) as f:
+            yield f
+    elif suffix == '.zst':
+        process = subprocess.Popen([get_zstd(), '-dcq', path], stdout=subprocess.PIPE)
+        try:
+            yield process.stdout
+        finally:
+            process.stdout.close()
+            process.wait()
+    else:
+        with open(path, 'rb') as f:
+            yield f
+
+
+@contextlib.contextmanager
+def open_stdin(path):
+    """file for stdin of a process, compressed file is decompressed by a thread into a pipe"""
+    if not get_suffix(path):
+        with open(path, 'rb') as f:
+            yield f
+        return
+
+    read_fd, write_fd = os.pipe()
+
+    def feed():
+        try:
+            with open_read(path) as src:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                    view = memoryview(chunk)
+                    while view:
+                        view = view[os.write(write_fd, view):]
+        except OSError:  # process has exited without reading the whole input
+            pass
+        finally:
+            os.close(write_fd)
+
+    thread = threading.Thread(target=feed, daemon=True)
+    thread.start()
+    try:
+        with open(read_fd, 'rb') as f:
+            yield f
+    finally:
+        thread.join()
+
+
+@contextlib.contextmanager
+def plain_file(path, tmp_path):
+    """yields path of plain file with content of the file, compressed file is decompressed into tmp_path"""
+    if not get_suffix(path):
+        yield path
+        return
+
+    os.makedirs(os.path.dirname(tmp_path) or '.', exist_ok=True)
+    try:
+        with open_read(path) as src, open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        yield tmp_path
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextlib.contextmanager
+def pipe_file(path, tmp_path):
+    """yields path a child process can read the file by and fds it has to inherit
+
+    Compressed file is streamed through a pipe opened as /dev/fd/N, so it isn't unpacked to disk. Systems without
+    /dev/fd get a plain copy in tmp_path instead.
+    """
+    if not get_suffix(path) or not os.path.isdir('/dev/fd'):
+        with plain_file(path, tmp_path) as plain_path:
+            yield plain_path, ()
+        return
+
+    with open_stdin(path) as f:
+        yield '/dev/fd/{0}'.format(f.fileno()), (f.fileno(),)
+
+
+def files_equal(plain_path, path):
+    """compares plain file with content of possibly compressed file without unpacking it to disk"""
+    if not get_suffix(path):
+        return filecmp.cmp(plain_path, path, shallow=False)
+
+    with open(plain_path, 'rb') as f1, open_read(path) as f2:
+        while True:
+            chunk = f1.read(CHUNK_SIZE)
+            if f2.read(len(chunk) or 1) != chunk:
+                return False
+            if not chunk:
+                return True
+
+
+def copy_plain(path, dest):
+    """copies content of possibly compressed file to plain file"""
+    with open_read(path) as src, open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+
+def compress_file(path, suffix):
+    """replaces plain file with its compressed version, returns path of the new file"""
+    dest = path + suffix
+    tmp_dest = dest + '.tmp'
+    if suffix == '.gz':
+        # mtime=0 and no name make the same content produce the same file
+        with open(path, 'rb') as src, open(tmp_dest, 'wb') as raw_dst, \
+                gzip.GzipFile('', 'wb', fileobj=raw_dst, mtime=0) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+    elif suffix == '.zst' and zstandard is not None:
+        with open(path, 'rb') as src, open(tmp_dest, 'wb') as raw_dst:
+            zstandard.ZstdCompressor().copy_stream(src, raw_dst)
+    elif suffix == '.zst':
+        subprocess.run([get_zstd(), '-qf', path, '-o', tmp_dest], check=True)
+    else:
+        raise ValueError('Unknown compression ({0})'.format(suffix))
+
+    os.replace(tmp_dest, dest)
+    os.remove(path)
+    return dest
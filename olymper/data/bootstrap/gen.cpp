@@ -20,7 +20,7 @@ const char* testsPath = "tests";
 int testNum = 0, tInf = 0;
 int outF;
 enum OutputFormat {
-    NORMAL, TESTLIB, SINGLE
+    NORMAL, TESTLIB, SINGLE, BATCH  // BATCH: gen 3 <seed> <count> writes tests 1..count for stress
 };
 
 void printTestInfo(const char *format, ...) {
@@ -95,6 +95,7 @@ public:
                 inf = fopen(fileName, "w");
                 break;
             case TESTLIB:
+            case BATCH:
                 startTest(testNum);
                 inf = stdout;
                 break;
@@ -133,9 +134,17 @@ int main(int argc, char** argv) {
 
     long long maxn = 2000; // problem maximum
     if(outF == SINGLE) {
+        if(argc > 3)  // gen 2 <seed> <n>, n is searched by stress --hunt-tl
+            maxn = min(maxn, atoll(argv[3]));
         TestCase().genRandomTest(maxn)->printTest();
         return 0;
     }
+    if(outF == BATCH) {
+        int count = atoi(argv[3]);
+        for(int i = 0; i < count; ++i)
+            TestCase().genRandomTest(maxn)->printTest();
+        return 0;
+    }
 
     TestCase().genHandTest(0)->printTest();
     TestCase().genHandTest(1)->printTest();
@@ -1,18 +1,181 @@
+import concurrent.futures
+import shlex
+import shutil
+import signal
 import subprocess
+import sys
+import threading
 import time
+import zipfile
 import collections
-import hashlib
 import os
 
+from olymper import compile_cache
+from olymper import limits
 from olymper.misc import pjoin
 from olymper.misc import bcolors
 
 __author__ = 'ksg'
 
 
+class BuildScheduler:
+    """runs compilers in a pool with limited number of jobs, identical targets are compiled only once"""
+
+    def __init__(self, jobs=None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.pool = None
+        self.futures = {}
+        self.lock = threading.Lock()
+
+    def set_jobs(self, jobs):
+        with self.lock:
+            self.jobs = jobs or os.cpu_count() or 1
+            if self.pool:
+                self.pool.shutdown(wait=False)
+                self.pool = None
+
+    def submit(self, func, target=None):
+        """returns future for func(), if target is already being built returns its future"""
+        with self.lock:
+            if target is not None and target in self.futures:
+                return self.futures[target]
+
+            if self.pool is None:
+                self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs)
+            future = self.pool.submit(func)
+            if target is not None:
+                self.futures[target] = future
+            return future
+
+
+scheduler = BuildScheduler()
+
+
+DEFAULT_CAPTURE_LIMIT = 64 * 1024  # in bytes, for each end of captured output
+
+
+def decode_output(output):
+    if output:
+        output = str(output, 'utf-8', 'replace')
+        if output.endswith('\n'):
+            output = output[:-1]
+    else:
+        output = None
+    return output
+
+
+class ExecResult(collections.namedtuple('ExecResult', ['returncode', 'exec_time', 'stdout_data', 'stderr_data',
+                                                       'user_time', 'sys_time', 'max_rss', 'oom_killed',
+                                                       'output_limit_exceeded'])):
+    """result of Executable.execute(), times are in seconds, max_rss is in KB (None if not available)
+
+    Captured outputs are kept as bytes and decoded on access to stdout/stderr.
+    Linux counts memory of olymper itself in max_rss of its children, exact values need cgroup limit backend.
+    """
+    __slots__ = ()
+
+    def __new__(cls, returncode, exec_time, stdout_data, stderr_data, user_time=None, sys_time=None, max_rss=None,
+                oom_killed=False, output_limit_exceeded=False):
+        return super().__new__(cls, returncode, exec_time, stdout_data, stderr_data, user_time, sys_time, max_rss,
+                               oom_killed, output_limit_exceeded)
+
+    @property
+    def stdout(self):
+        return decode_output(self.stdout_data)
+
+    @property
+    def stderr(self):
+        return decode_output(self.stderr_data)
+
+    @property
+    def cpu_time(self):
+        if self.user_time is None:
+            return None
+        return self.user_time + self.sys_time
+
+
+class BoundedCapture:
+    """reads pipe until EOF, but keeps only first and last `limit` bytes"""
+
+    def __init__(self, limit=DEFAULT_CAPTURE_LIMIT, output_limit=None, on_output_limit=None):
+        self.limit = limit
+        self.output_limit = output_limit
+        self.on_output_limit = on_output_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def read_from(self, pipe):
+        with pipe:
+            while True:
+                chunk = os.read(pipe.fileno(), 1 << 16)
+                if not chunk:
+                    break
+                self.add(chunk)
+
+    def add(self, chunk):
+        self.total += len(chunk)
+        if self.output_limit is not None and self.total > self.output_limit and self.on_output_limit:
+            self.on_output_limit()
+            self.on_output_limit = None
+
+        if len(self.head) < self.limit:
+            head_size = self.limit - len(self.head)
+            self.head += chunk[:head_size]
+            chunk = chunk[head_size:]
+        self.tail += chunk
+        if len(self.tail) > 2 * self.limit:  # trimmed rarely to keep it amortized linear
+            del self.tail[:-self.limit]
+
+    def getvalue(self):
+        if len(self.tail) > self.limit:
+            del self.tail[:-self.limit]
+        skipped = self.total - len(self.head) - len(self.tail)
+        if skipped == 0:
+            return bytes(self.head + self.tail)
+        return bytes(self.head) + '\n... [{0} bytes skipped] ...\n'.format(skipped).encode() + bytes(self.tail)
+
+
+def split_args(args):
+    """splits command line arguments like shell does, lists are returned as is"""
+    if not isinstance(args, str):
+        return list(args)
+    if not args:
+        return []
+    return shlex.split(args, posix=os.name != 'nt')
+
+
+_python_interpreter = None
+
+# runs compiled main script as if its source was run: python -c PYC_RUNNER <pyc> <source> <args>
+PYC_RUNNER = '''import marshal, os, sys, types
+pyc, sys.argv = sys.argv[1], sys.argv[2:]
+sys.path[0] = os.path.dirname(os.path.abspath(sys.argv[0]))
+with open(pyc, 'rb') as f:
+    code = marshal.loads(f.read()[16:])
+main = types.ModuleType('__main__')
+main.__file__ = sys.argv[0]
+main.__builtins__ = __builtins__
+sys.modules['__main__'] = main
+del marshal, os, sys, types, pyc, f
+exec(code, main.__dict__)
+'''
+
+
+def get_python_interpreter():
+    """returns name of Python 3 interpreter, looks for it once per process"""
+    global _python_interpreter
+    if _python_interpreter is None:
+        # command 'python3' doesn't exists on Windows
+        _python_interpreter = 'python3' if shutil.which('python3') else 'python'
+    return _python_interpreter
+
+
 class Executable:
     def __init__(self, src_path, target='', use_testlib=False, lang=None, compiler_flags='',
-                 work_dir='.', ml=512, use_precompiled=True, save_compiled=True):
+                 work_dir='.', ml=512, use_precompiled=True, save_compiled=True, build_scheduler=None,
+                 java_cds=False, interpreter_flags='', limit_backend=None, capture_limit=DEFAULT_CAPTURE_LIMIT,
+                 output_limit=None):
         self.src_path = src_path
         self.target = target
         self.lang = lang or Executable.guess_lang(src_path)
@@ -22,99 +185,168 @@ class Executable:
         self.ml = int(ml)
         self.use_precompiled = use_precompiled
         self.save_compiled = save_compiled
-        self.compile_process = None
+        self.scheduler = build_scheduler or scheduler
+        self.compile_cmd = None
+        self.pch = None
+        self.java_cds = java_cds
+        self.interpreter_flags = interpreter_flags
+        self.limits = limits.get_backend(limit_backend)
+        self.capture_limit = capture_limit
+        self.output_limit = output_limit  # in MB, for both files and pipes
+        self.compile_future = None
         self.compiled = False
-        self.exec_cmd = ''
+        self.exec_argv = []
+        self.exec_out = None
+        self.cache_key = None
+        self.cache = compile_cache.CompileCache()
 
         self.start_compilation()
 
     def compile_bash(self):
-        self.exec_cmd = 'bash ' + os.path.relpath(self.src_path, self.work_dir)
+        self.exec_argv = ['bash', os.path.relpath(self.src_path, self.work_dir)]
         self.compiled = True
 
-    def compile_cpp(self):
-        if not os.path.exists('tmp'):
-            os.mkdir('tmp')
+    def prepare_output(self, version_cmd, flags, suffix='.out'):
+        """computes cache key and path of compiled binary, takes binary from cache if possible"""
+        os.makedirs('tmp', exist_ok=True)
 
-        exec_out = pjoin('tmp', os.path.basename(self.src_path) + '.out')
-        # if work_dir is 'tmp' we should call './binary' instead of 'binary'
-        self.exec_cmd = os.path.join('./', os.path.relpath(exec_out, self.work_dir))
+        include_dirs = [pjoin('..', '..', 'lib')] if self.use_testlib else []
+        self.cache_key = compile_cache.get_key(self.src_path, self.lang, flags,
+                                               compile_cache.get_toolchain_version(version_cmd), include_dirs)
+
+        # key in the name prevents collisions of sources with the same name from different folders
+        name = os.path.basename(self.src_path)
+        if suffix:
+            name += suffix
+        self.exec_out = pjoin('tmp', '{0}.{1}'.format(name, self.cache_key[:8]))
 
-        if self.use_precompiled and Executable.check_hash(self.src_path):
+        if self.use_precompiled and self.cache.fetch(self.cache_key, self.exec_out):
             print('Using previous version of binary\n')
             self.compiled = True
-            return  # TODO check for preprocessor and compiler flags
 
-        cxx_compiler = 'g++ {} '.format(self.flags or '-O2 -Wall -xc++ -std=c++11')
+        return self.exec_out
+
+    def get_build_key(self):
+        """changes when source, compiler flags or toolchain change, doesn't require finished compilation"""
+        if self.cache_key:
+            return self.cache_key
+        return compile_cache.get_key(self.src_path, self.lang, ' '.join(self.exec_argv), '')
+
+    def compile_cpp(self):
+        flags = self.flags or '-O2 -Wall -xc++ -std=c++11'
+        exec_out = self.prepare_output(['g++', '--version'], flags)
+        # if work_dir is 'tmp' we should call './binary' instead of 'binary'
+        self.exec_argv = [os.path.join('./', os.path.relpath(exec_out, self.work_dir))]
+
+        if self.compiled:
+            return
+
+        cxx_compiler = ['g++'] + split_args(flags)
         if self.use_testlib:
-            cxx_compiler += '-I{0} '.format(pjoin('..', '..', 'lib'))
-        self.compile_process = subprocess.Popen('{0} "{1}" -o {2}'.format(cxx_compiler, self.src_path, exec_out),
-                                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
+            testlib_path = pjoin('..', '..', 'lib', 'testlib.h')
+            if os.path.exists(testlib_path):
+                # gcc looks for testlib.h.gch in each include folder before testlib.h itself
+                pch_cache = compile_cache.get_pch_cache()
+                pch_key = compile_cache.get_pch_key(testlib_path, flags,
+                                                    compile_cache.get_toolchain_version(['g++', '--version']))
+                self.pch = (pch_cache, pch_key, testlib_path, flags)
+                cxx_compiler.append('-I' + pch_cache.entry_path(pch_key))
+            cxx_compiler.append('-I' + pjoin('..', '..', 'lib'))
+        self.compile_cmd = cxx_compiler + [self.src_path, '-o', exec_out]
 
     def compile_delphi(self):
-        if not os.path.exists('tmp'):
-            os.mkdir('tmp')
-
-        exec_out = pjoin('tmp', os.path.basename(self.src_path) + '.out')
+        exec_out = self.prepare_output(['fpc', '-iV'], '-MDELPHI ' + self.flags)
         # if work_dir is 'tmp' we should call './binary' instead of 'binary'
-        self.exec_cmd = os.path.join('./', os.path.relpath(exec_out, self.work_dir))
+        self.exec_argv = [os.path.join('./', os.path.relpath(exec_out, self.work_dir))]
 
-        if self.use_precompiled and Executable.check_hash(self.src_path):
-            print('Using previous version of binary\n')
-            self.compiled = True
-            return  # TODO check for preprocessor and compiler flags
+        if self.compiled:
+            return
 
-        pas_compiler = 'fpc -MDELPHI {0} '.format(self.flags)  # TODO java testlib
-        self.compile_process = subprocess.Popen('{0} "{1}" -o{2}'.format(pas_compiler, self.src_path, exec_out),
-                                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
+        pas_compiler = ['fpc', '-MDELPHI'] + split_args(self.flags)  # TODO java testlib
+        self.compile_cmd = pas_compiler + [self.src_path, '-o' + exec_out]
 
     def compile_java(self):
-        if not os.path.exists('tmp'):
-            os.mkdir('tmp')
-        out_folder = pjoin('tmp', os.path.basename(self.src_path[:-len('.java')]))
+        flags = self.flags
+        if self.java_cds:  # archive depends on JVM version and is stored with classes
+            flags += ' -cds ' + compile_cache.get_toolchain_version(['java', '-version'])
+        out_folder = self.prepare_output(['javac', '-version'], flags, suffix='')
         if not os.path.exists(out_folder):
             os.mkdir(out_folder)
 
-        ml = self.ml
-        self.exec_cmd = 'java -cp {0} -Xmx{2}M -Xss{3}M {1}'.format(os.path.relpath(out_folder, self.work_dir),
-                                                                    os.path.basename(self.src_path[:-len('.java')]),
-                                                                    ml, ml // 2)
+        self.set_java_cmd()
 
-        if self.use_precompiled and Executable.check_hash(self.src_path):
-            print('Using previous version of binary\n')
-            self.compiled = True
-            return  # TODO check for preprocessor and compiler flags
+        if self.compiled:
+            return
 
-        java_compiler = 'javac {0}'.format(self.flags)  # TODO java testlib
-        self.compile_process = subprocess.Popen('{0} "{1}" -d {2}'.format(java_compiler, self.src_path, out_folder),
-                                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
+        java_compiler = ['javac'] + split_args(self.flags)  # TODO java testlib
+        self.compile_cmd = java_compiler + [self.src_path, '-d', out_folder]
 
-    def compile_pascal(self):
-        if not os.path.exists('tmp'):
-            os.mkdir('tmp')
+    def java_archive_path(self):
+        return pjoin(self.exec_out, 'app.jsa')
 
-        exec_out = pjoin('tmp', os.path.basename(self.src_path) + '.out')
+    def java_jar_path(self):
+        return pjoin(self.exec_out, 'app.jar')
+
+    def set_java_cmd(self):
+        class_name = os.path.basename(self.src_path[:-len('.java')])
+        ml = self.ml
+        class_path = os.path.relpath(self.exec_out, self.work_dir)
+        cds = []
+        if self.java_cds and os.path.exists(self.java_archive_path()):
+            class_path = os.path.relpath(self.java_jar_path(), self.work_dir)
+            cds = ['-XX:SharedArchiveFile=' + os.path.relpath(self.java_archive_path(), self.work_dir), '-Xshare:auto']
+        self.exec_argv = ['java'] + cds + ['-cp', class_path, '-Xmx{0}M'.format(ml), '-Xss{0}M'.format(ml // 2),
+                                           class_name]
+
+    def dump_java_archive(self):
+        """runs the solution once on empty input to create AppCDS archive with its classes"""
+        # CDS archives only classes from jar files, so classes are packed first
+        with zipfile.ZipFile(self.java_jar_path(), 'w') as jar:
+            for root, dirs, files in os.walk(self.exec_out):
+                for name in files:
+                    if name.endswith('.class'):
+                        jar.write(pjoin(root, name), os.path.relpath(pjoin(root, name), self.exec_out))
+
+        class_name = os.path.basename(self.src_path[:-len('.java')])
+        cmd = ['java', '-XX:ArchiveClassesAtExit={0}'.format(os.path.relpath(self.java_archive_path(), self.work_dir)),
+               '-cp', os.path.relpath(self.java_jar_path(), self.work_dir), class_name]
+        try:
+            subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           cwd=self.work_dir, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        if not os.path.exists(self.java_archive_path()):
+            print(bcolors.WARNING + 'Can\'t create class data sharing archive for {0}'.format(self.target) +
+                  bcolors.ENDC)
+
+    def compile_pascal(self):
+        exec_out = self.prepare_output(['fpc', '-iV'], self.flags)
         # if work_dir is 'tmp' we should call './binary' instead of 'binary'
-        self.exec_cmd = os.path.join('./', os.path.relpath(exec_out, self.work_dir))
+        self.exec_argv = [os.path.join('./', os.path.relpath(exec_out, self.work_dir))]
 
-        if self.use_precompiled and Executable.check_hash(self.src_path):
-            print('Using previous version of binary\n')
-            self.compiled = True
-            return  # TODO check for preprocessor and compiler flags
+        if self.compiled:
+            return
 
-        pas_compiler = 'fpc {0} '.format(self.flags)  # TODO java testlib
-        self.compile_process = subprocess.Popen('{0} "{1}" -o{2}'.format(pas_compiler, self.src_path, exec_out),
-                                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True)
+        pas_compiler = ['fpc'] + split_args(self.flags)  # TODO java testlib
+        self.compile_cmd = pas_compiler + [self.src_path, '-o' + exec_out]
 
     def compile_python3(self):
-        if os.system('python3 -V') == 0:  # command 'python3' doesn't exists on Windows
-            self.exec_cmd = 'python3 ' + os.path.relpath(self.src_path, self.work_dir)
-        else:
-            self.exec_cmd = 'python ' + os.path.relpath(self.src_path, self.work_dir)
-        self.compiled = True
+        python = get_python_interpreter()
+        # sources are byte-compiled into tmp, so syntax errors are reported as compilation errors and runs don't
+        # compile the main script again; the runner makes sys.path[0] and __file__ point to the source
+        pyc_out = self.prepare_output([python, '--version'], self.interpreter_flags, suffix='.pyc')
+        self.exec_argv = [python] + split_args(self.interpreter_flags) + \
+            ['-c', PYC_RUNNER, os.path.relpath(pyc_out, self.work_dir), os.path.relpath(self.src_path, self.work_dir)]
+
+        if self.compiled:
+            return
+
+        self.compile_cmd = [python, '-c', 'import py_compile, sys; '
+                                          'py_compile.compile(sys.argv[1], sys.argv[2], doraise=True)',
+                            self.src_path, pyc_out]
 
     def compile_shell(self):
-        self.exec_cmd = 'sh ' + os.path.relpath(self.src_path, self.work_dir)
+        self.exec_argv = ['sh', os.path.relpath(self.src_path, self.work_dir)]
         self.compiled = True
 
     def start_compilation(self):
@@ -134,12 +366,28 @@ class Executable:
 
         (lang_to_comp[self.lang])()
 
+        if not self.compiled:
+            # binaries are content-addressed, so the same path means the same compilation
+            target = os.path.abspath(self.exec_out) if self.use_precompiled else None
+            self.compile_future = self.scheduler.submit(self.run_compiler, target)
+
+    def run_compiler(self):
+        if self.pch:
+            compile_cache.build_pch(*self.pch)  # compiler just skips missing include folder if it fails
+        try:
+            process = subprocess.run(self.compile_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:  # compiler isn't installed
+            return -1, None, bytes(str(e), 'utf-8')
+        if process.returncode == 0 and self.lang == 'Java' and self.java_cds:
+            self.dump_java_archive()
+        return process.returncode, process.stdout, process.stderr
+
     def finish_compilation(self):
         if self.compiled:
             return
 
         print('Finishing compilation of {0}'.format(self.target))
-        cout, cerr = self.compile_process.communicate()
+        res, cout, cerr = self.compile_future.result()
 
         cout = self.process_output(cout)
         cerr = self.process_output(cerr)
@@ -148,61 +396,144 @@ class Executable:
             if x:
                 print(bcolors.WARNING + x + bcolors.ENDC)
 
-        res = self.compile_process.returncode
-
         if res != 0:
             raise Exception('Compilation error ({})'.format(self.src_path))
 
-        if self.save_compiled:
-            Executable.write_hash(self.src_path)
+        if self.lang == 'Java':
+            self.set_java_cmd()  # archive exists only after compilation
+
+        if self.save_compiled and self.cache_key:
+            self.cache.store(self.cache_key, self.exec_out)
 
         print('Compilation of {0} finished'.format(self.target))
 
         self.compiled = True
 
-    def execute(self, stdin=None, stdout=None, stderr=None, tl=None, args=''):
+    def execute(self, stdin=None, stdout=None, stderr=None, tl=None, args='', pass_fds=()):
         if not self.compiled:
             self.finish_compilation()
 
-        start_time = time.time()
-
-        process = subprocess.Popen((self.exec_cmd + ' ' + args).split(),
-                                   stdin=stdin, stdout=stdout, stderr=stderr,
-                                   preexec_fn=self.get_limit_func(),
-                                   cwd=self.work_dir)
-
+        output_limit = self.output_limit * 1024 ** 2 if self.output_limit else None
+        limit_run = self.limits.create_run(self.ml, self.lang, output_limit)
         try:
-            cout, cerr = process.communicate(timeout=tl)
-        except subprocess.TimeoutExpired:
-            process.kill()
-            raise
-
-        cout = self.process_output(cout)
-        cerr = self.process_output(cerr)
+            start_time = time.monotonic()
+
+            # without preexec_fn subprocess can use vfork/posix_spawn instead of slow fork
+            process = subprocess.Popen(limit_run.get_wrapper() + self.exec_argv + split_args(args),
+                                       stdin=stdin, stdout=stdout, stderr=stderr,
+                                       preexec_fn=limit_run.get_preexec_fn(),
+                                       cwd=self.work_dir, pass_fds=pass_fds)
+
+            rusage = None
+            if hasattr(os, 'wait4'):  # works only for Unix
+                cout, cerr, rusage, pipe_limit_exceeded = self.wait_process(process, tl, output_limit)
+            else:
+                try:
+                    cout, cerr = process.communicate(timeout=tl)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    raise
+                cout = self.bound_output(cout)
+                cerr = self.bound_output(cerr)
+                pipe_limit_exceeded = False
+
+            end_time = time.monotonic()
+        finally:
+            usage = limit_run.finish()
 
         res = process.returncode
 
-        end_time = time.time()
         exec_time = end_time - start_time
 
-        exec_res_type = collections.namedtuple('exec_res_type',
-                                               ['returncode', 'exec_time', 'stdout', 'stderr'])
-        return exec_res_type(res, exec_time, cout, cerr)
+        output_limit_exceeded = pipe_limit_exceeded or limits.is_file_size_signal(res) or \
+            self.is_file_limit_reached(stdout, output_limit)
+        exec_res = ExecResult(res, exec_time, cout, cerr, output_limit_exceeded=output_limit_exceeded)
+        if rusage is not None:
+            max_rss = rusage.ru_maxrss
+            if sys.platform == 'darwin':  # bytes instead of kilobytes
+                max_rss //= 1024
+            exec_res = exec_res._replace(user_time=rusage.ru_utime, sys_time=rusage.ru_stime, max_rss=max_rss)
+        if usage:  # cgroup accounts all processes of the run and real memory usage
+            exec_res = exec_res._replace(**{k: v for k, v in usage._asdict().items() if v is not None})
+        return exec_res
 
-    def get_limit_func(self):
-        if self.lang == 'Java':
-            return None
+    @staticmethod
+    def is_file_limit_reached(file, output_limit):
+        """runtimes ignoring SIGXFSZ (like Python) get write error instead, so the size of the file is checked too"""
+        if not output_limit or not hasattr(file, 'fileno'):
+            return False
         try:
-            # noinspection PyUnresolvedReferences
-            import resource  # works only for Unix
-
-            ml = self.ml
-            if ml != -1:
-                ml *= 1024 ** 2
-            hard_limit = resource.getrlimit(resource.RLIMIT_AS)[1]
-            return lambda: resource.setrlimit(resource.RLIMIT_AS, (ml, hard_limit))
-        except ImportError:
+            return os.fstat(file.fileno()).st_size > output_limit
+        except (OSError, ValueError):
+            return False
+
+    def bound_output(self, output):
+        if output is None:
+            return None
+        capture = BoundedCapture(self.capture_limit)
+        capture.add(output)
+        return capture.getvalue()
+
+    def wait_process(self, process, tl=None, output_limit=None):
+        """like process.communicate(), but reaps the process with os.wait4() to get its resource usage
+
+        Captured pipes are streamed with bounded memory, process is killed when it writes more than output_limit.
+        """
+        limit_exceeded = []
+
+        def kill():
+            limit_exceeded.append(True)
+            # process.kill() would poll and reap the process, so os.wait4() couldn't get its usage
+            os.kill(process.pid, signal.SIGKILL)
+
+        captures = {}
+        for name, pipe in (('stdout', process.stdout), ('stderr', process.stderr)):
+            if pipe:
+                captures[name] = BoundedCapture(self.capture_limit, output_limit, kill)
+        readers = [threading.Thread(target=captures[name].read_from, args=(pipe,), daemon=True)
+                   for name, pipe in (('stdout', process.stdout), ('stderr', process.stderr)) if pipe]
+
+        status = {}
+
+        def wait():
+            status['pid'], status['status'], status['rusage'] = os.wait4(process.pid, 0)
+
+        waiter = threading.Thread(target=wait)
+        for thread in readers + [waiter]:
+            thread.start()
+
+        waiter.join(tl)
+        timed_out = waiter.is_alive()
+        if timed_out:
+            os.kill(process.pid, signal.SIGKILL)
+            waiter.join()
+            # process is already reaped, so Popen shouldn't wait for it
+            process.returncode = os.waitstatus_to_exitcode(status['status'])
+            # readers aren't joined, children of the process may still keep pipes open
+            raise subprocess.TimeoutExpired(process.args, tl)
+
+        for thread in readers:
+            thread.join()
+        process.returncode = os.waitstatus_to_exitcode(status['status'])
+
+        outputs = {name: capture.getvalue() for name, capture in captures.items()}
+        return outputs.get('stdout'), outputs.get('stderr'), status['rusage'], bool(limit_exceeded)
+
+    def get_startup_time(self, runs=3):
+        """returns JVM startup time (best of several runs), it is a part of every execution time for Java"""
+        if self.lang != 'Java':
             return None
+        if not self.compiled:
+            self.finish_compilation()
+
+        jvm_args = self.exec_argv[:-1] + ['-version']
+        best_time = None
+        for i in range(runs):
+            start_time = time.time()
+            subprocess.run(jvm_args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=self.work_dir)
+            exec_time = time.time() - start_time
+            best_time = exec_time if best_time is None else min(best_time, exec_time)
+        return best_time
 
     @staticmethod
     def guess_lang(src_path: str):
@@ -222,36 +553,6 @@ class Executable:
 
         raise Exception('Compilation error (Unknown language, {0})'.format(src_path))
 
-    @staticmethod
-    def get_hash(file, info=''):
-        with open(file) as f:
-            content = info + '-----' + f.read()
-            m = hashlib.md5()
-            m.update(content.encode('utf-8'))
-            return m.hexdigest()
-
-    @staticmethod
-    def check_hash(file, info=''):
-        cur_hash = Executable.get_hash(file, info)
-        prev_hash = ''
-        if os.path.exists(pjoin('tmp', os.path.basename(file) + '.hash')):
-            with open(pjoin('tmp', os.path.basename(file) + '.hash')) as f:
-                prev_hash = f.read()
-
-        return prev_hash == cur_hash
-
-    @staticmethod
-    def write_hash(file, info=''):
-        cur_hash = Executable.get_hash(file, info)
-        with open(pjoin('tmp', os.path.basename(file) + '.hash'), 'w') as f:
-            f.write(cur_hash)
-
     @staticmethod
     def process_output(output):
-        if output:
-            output = str(output, 'utf-8')
-            if output.endswith('\n'):
-                output = output[:-1]
-        else:
-            output = None
-        return output
\ No newline at end of file
+        return decode_output(output)
@@ -0,0 +1,253 @@
+import collections
+import itertools
+import os
+import shutil
+import signal
+import time
+
+from olymper.misc import pjoin
+
+__author__ = 'ksg'
+
+LimitUsage = collections.namedtuple('LimitUsage', ['user_time', 'sys_time', 'max_rss', 'oom_killed'])
+
+_cgroup_root = None
+_cgroup_warning_shown = False
+_run_counter = itertools.count()
+_prlimit = None
+
+
+def get_prlimit():
+    """returns path of prlimit utility (util-linux) or None, looks for it once"""
+    global _prlimit
+    if _prlimit is None:
+        _prlimit = shutil.which('prlimit') or ''
+    return _prlimit or None
+
+
+def is_file_size_signal(returncode):
+    """process was killed for exceeding RLIMIT_FSIZE"""
+    return hasattr(signal, 'SIGXFSZ') and returncode == -signal.SIGXFSZ
+
+
+def get_file_size_wrapper(output_limit):
+    if not output_limit or not get_prlimit():
+        return []
+    return [get_prlimit(), '--fsize={0}:'.format(output_limit + 1), '--']
+
+
+class RlimitRun:
+    """memory limit as RLIMIT_AS, doesn't work for Java and other runtimes reserving a lot of virtual memory
+
+    output_limit (in bytes) limits size of files written by the process (RLIMIT_FSIZE).
+    """
+
+    def __init__(self, ml, lang, output_limit=None):
+        self.ml = ml
+        self.lang = lang
+        self.output_limit = output_limit
+
+    def get_limits(self):
+        # noinspection PyUnresolvedReferences
+        import resource  # works only for Unix
+
+        res = []
+        if self.lang != 'Java' and self.ml != -1:
+            res.append((resource.RLIMIT_AS, '--as', self.ml * 1024 ** 2))
+        if self.output_limit:
+            # one more byte, so output of exactly output_limit bytes is allowed and a longer one is detectable
+            res.append((resource.RLIMIT_FSIZE, '--fsize', self.output_limit + 1))
+        return res
+
+    def get_wrapper(self):
+        """command prefix applying limits, so the process can be started without preexec_fn"""
+        try:
+            rlimits = self.get_limits()
+        except ImportError:
+            return []
+        if not rlimits or not get_prlimit():
+            return []
+        # only soft limits are set, like setrlimit() in get_preexec_fn()
+        return [get_prlimit()] + ['{0}={1}:'.format(option, value) for resource_id, option, value in rlimits] + ['--']
+
+    def get_preexec_fn(self):
+        try:
+            # noinspection PyUnresolvedReferences
+            import resource  # works only for Unix
+
+            rlimits = self.get_limits()
+        except ImportError:
+            return None
+        if not rlimits or self.get_wrapper():
+            return None
+
+        rlimits = [(resource_id, value, resource.getrlimit(resource_id)[1]) for resource_id, option, value in rlimits]
+
+        def set_limits():
+            for resource_id, value, hard_limit in rlimits:
+                resource.setrlimit(resource_id, (value, hard_limit))
+
+        return set_limits
+
+    def finish(self):
+        return None
+
+
+class CgroupRun:
+    """transient cgroup v2 for a single run, limits real memory usage (memory.max)"""
+
+    def __init__(self, root, ml, output_limit=None):
+        self.output_limit = output_limit
+        self.path = pjoin(root, 'olymper-{0}-{1}'.format(os.getpid(), next(_run_counter)))
+        os.mkdir(self.path)
+        try:
+            self.write('memory.max', str(ml * 1024 ** 2) if ml != -1 else 'max')
+            if os.path.exists(pjoin(self.path, 'memory.swap.max')):
+                self.write('memory.swap.max', '0')
+        except OSError:
+            os.rmdir(self.path)
+            raise
+
+    def write(self, name, value):
+        with open(pjoin(self.path, name), 'w') as f:
+            f.write(value)
+
+    def read(self, name):
+        with open(pjoin(self.path, name)) as f:
+            return f.read()
+
+    def read_keys(self, name):
+        res = {}
+        for line in self.read(name).splitlines():
+            key, value = line.split()
+            res[key] = int(value)
+        return res
+
+    def get_wrapper(self):
+        # shell moves itself into the cgroup and is replaced by the process
+        return get_file_size_wrapper(self.output_limit) + \
+            ['sh', '-c', 'echo $$ > "$0" && exec "$@"', pjoin(self.path, 'cgroup.procs')]
+
+    def get_preexec_fn(self):
+        return None
+
+    def finish(self):
+        """returns resource usage of all processes of the run and removes the cgroup"""
+        try:
+            cpu_stat = self.read_keys('cpu.stat')
+            events = self.read_keys('memory.events')
+            if os.path.exists(pjoin(self.path, 'memory.peak')):  # Linux 5.19+
+                max_rss = int(self.read('memory.peak')) // 1024
+            else:
+                max_rss = None
+            return LimitUsage(cpu_stat['user_usec'] / 10 ** 6, cpu_stat['system_usec'] / 10 ** 6, max_rss,
+                              events.get('oom_kill', 0) > 0)
+        finally:
+            self.remove()
+
+    def remove(self):
+        if os.path.exists(pjoin(self.path, 'cgroup.kill')):  # children of the process can be still alive
+            self.write('cgroup.kill', '1')
+        for i in range(100):
+            try:
+                os.rmdir(self.path)
+                return
+            except OSError:  # killed processes aren't reaped yet
+                time.sleep(0.01)
+
+
+class RlimitBackend:
+    name = 'rlimit'
+
+    def create_run(self, ml, lang, output_limit=None):
+        return RlimitRun(ml, lang, output_limit)
+
+
+class CgroupBackend:
+    name = 'cgroup'
+
+    def __init__(self, root):
+        self.root = root
+
+    def create_run(self, ml, lang, output_limit=None):
+        try:
+            return CgroupRun(self.root, ml, output_limit)
+        except OSError:  # cgroup became unavailable, fall back to today's limits
+            return RlimitRun(ml, lang, output_limit)
+
+
+def find_cgroup_root():
+    """returns writable cgroup v2 folder with memory controller for children or None, looks for it once"""
+    global _cgroup_root
+    if _cgroup_root is None:
+        _cgroup_root = ''
+        for path in (os.environ.get('OLYMPER_CGROUP'), get_own_cgroup()):
+            if path and is_cgroup_usable(path):
+                _cgroup_root = path
+                break
+    return _cgroup_root or None
+
+
+def get_own_cgroup():
+    """returns folder of the cgroup v2 of olymper if it is the root cgroup, None otherwise
+
+    Processes can't be put into a cgroup delegating memory controller to its children (no internal processes rule),
+    only the root cgroup is an exception. Non-root cgroups have to be given in OLYMPER_CGROUP.
+    """
+    try:
+        with open('/proc/self/cgroup') as f:
+            own_path = [line[len('0::'):].strip() for line in f if line.startswith('0::')]
+        with open('/proc/self/mountinfo') as f:
+            mounts = [line.split() for line in f]
+    except OSError:  # not Linux
+        return None
+
+    path = get_cgroup_folder(own_path[0], mounts) if own_path else None
+    if path is None or not os.path.exists(pjoin(path, 'cgroup.procs')) or \
+            os.path.exists(pjoin(path, 'memory.max')):  # root cgroup has no memory.max
+        return None
+    return path
+
+
+def get_cgroup_folder(cgroup_path, mounts):
+    """returns folder of the cgroup by its path from /proc/<pid>/cgroup and lines of /proc/<pid>/mountinfo"""
+    for mount in mounts:
+        # fields after ' - ' separator are filesystem type and source
+        fs_type = mount[mount.index('-') + 1]
+        if fs_type != 'cgroup2':
+            continue
+        # root of the mount inside the hierarchy isn't '/' in containers and cgroup namespaces
+        mount_root, mount_point = mount[3], mount[4]
+        rel_path = os.path.relpath(cgroup_path, mount_root)
+        if rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep):  # cgroup isn't visible in this mount
+            continue
+        return os.path.normpath(pjoin(mount_point, rel_path))
+    return None
+
+
+def is_cgroup_usable(path):
+    try:
+        with open(pjoin(path, 'cgroup.subtree_control')) as f:
+            controllers = f.read().split()
+    except OSError:
+        return False
+    # cpu.stat is available without cpu controller
+    return 'memory' in controllers and os.access(path, os.W_OK)
+
+
+def get_backend(name=None):
+    """'cgroup', 'rlimit' or 'auto' (default): cgroup v2 if it is writable, otherwise rlimit"""
+    global _cgroup_warning_shown
+    name = name or 'auto'
+    if name not in ('auto', 'cgroup', 'rlimit'):
+        raise ValueError('Unknown limit backend ({0})'.format(name))
+
+    if name != 'rlimit':
+        root = find_cgroup_root()
+        if root:
+            return CgroupBackend(root)
+        if name == 'cgroup' and not _cgroup_warning_shown:
+            print('cgroup v2 isn\'t available, using rlimit for memory limits (set OLYMPER_CGROUP to a writable '
+                  'cgroup without processes which has memory in cgroup.subtree_control)')
+            _cgroup_warning_shown = True
+    return RlimitBackend()
@@ -9,6 +9,8 @@ __author__ = 'ksg'
 
 pjoin = os.path.join
 
+FALSE_STRINGS = ('', '0', 'false', 'no', 'off')
+
 
 class bcolors:
     HEADER = '\033[95m'
@@ -35,6 +37,13 @@ def write_log(s: str, end='\n', file='', out=None, write_to_stdout=True, write_t
         out.close()
 
 
+def parse_flag(value):
+    """converts config value to bool, strings 'false', '0', 'no' and 'off' are false"""
+    if isinstance(value, str):
+        return value.strip().lower() not in FALSE_STRINGS
+    return bool(value)
+
+
 class Config:
     def __init__(self):
         self.problem_cfg_is_json = None
@@ -79,6 +88,19 @@ class Config:
             lst.remove('general')
             return [(x, self.problem_cfg[x]['path']) for x in lst]
 
+    def get_solution_tag(self, path):
+        """tag of solution like in Polygon ('main', 'accepted', 'wrong-answer', ...) or None if it isn't set"""
+        if self.problem_cfg_is_json:
+            for solution in self.problem_cfg['solutions']:
+                if os.path.normpath(solution['path']) == os.path.normpath(path):
+                    return solution.get('tag') or ('main' if solution.get('is_main', False) else None)
+        else:
+            for x in self.problem_cfg.sections():
+                if x != 'general' and os.path.normpath(self.problem_cfg[x]['path']) == os.path.normpath(path):
+                    is_main = self.problem_cfg['general'].get('main solution') == x
+                    return self.problem_cfg[x].get('tag') or ('main' if is_main else None)
+        return None
+
     def get_problem_param(self, param, use_default=True):
         if use_default:
             if self.problem_cfg_is_json:
@@ -91,6 +113,13 @@ class Config:
             else:
                 return self.problem_cfg['general'][param]
 
+    def get_problem_flag(self, param):
+        """returns boolean param, strings 'false', '0', 'no' and 'off' are false, an ini key without value is true"""
+        value = self.get_problem_param(param, True)
+        if value is None:
+            return not self.problem_cfg_is_json and self.has_problem_param(param)
+        return parse_flag(value)
+
     def has_problem_param(self, param):
         if self.problem_cfg_is_json:
             return param in self.problem_cfg
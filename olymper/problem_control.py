@@ -1,14 +1,23 @@
 # !/usr/bin/python3
 import argparse
+import collections
+import concurrent.futures
 import datetime
 import ftplib
+import json
+import math
 import netrc
 import pkgutil
+import queue
 import subprocess
 import os
 import random
 import shutil
 import stat
+import statistics
+import tempfile
+import threading
+import time
 
 from paramiko import SSHClient
 import paramiko
@@ -18,6 +27,16 @@ from olymper import tex2xml
 from olymper import misc
 from olymper.misc import write_log
 from olymper.misc import bcolors
+from olymper import checkers
+from olymper import compression
+from olymper import executable
+from olymper import reports
+from olymper.build_manifest import BuildManifest
+from olymper.build_manifest import hash_test_file
+from olymper.check_cache import FailureHistory
+from olymper.check_cache import TestResult
+from olymper.check_cache import VerdictCache
+from olymper.check_cache import get_verdict_key
 from olymper.executable import Executable
 import olymper.polygon
 
@@ -26,36 +45,78 @@ pjoin = os.path.join
 __author__ = 'ksg'
 DEFAULT_TL = 3.0
 DEFAULT_ML = 512
+DEFAULT_OL = 256  # in MB
 DEFAULT_TEST_NUM_WIDTH = 2
+INDEX_VERSION = 3  # of cached TestSet index
+INDEX_RACY_WINDOW = 2 * 10 ** 9  # in ns, coarsest timestamp granularity (FAT), like racy git index
+CHECKER_STATUSES = {1: 'WA', 2: 'PE'}  # testlib exit codes, others are checker failures
+HIGH_VARIANCE_RATIO = 0.2  # spread of times relative to median
+HIGH_VARIANCE_MIN_SPREAD = 0.05  # in seconds, differences of very fast runs are noise
+TL_SUGGESTION_FACTOR = 2
+TL_SUGGESTION_STEP = 0.5  # in seconds
+MAX_SEED = 10 ** 18
+STRESS_PREFETCH = 2  # tests submitted ahead per job
+HUNT_KEEP = 5  # slowest tests kept while hunting
+HUNT_MIN_FACTOR = 0.5  # range of random changes of generator params
+HUNT_MAX_FACTOR = 1.5
+MEMORY_FS = '/dev/shm'  # tmpfs for scratch files of stress tests
+FAILURE_STATUSES = {'WA', 'PE', 'TL', 'ML', 'OL', 'RE'}
+# verdicts expected from solutions with Polygon tags
+TAG_VERDICTS = {
+    'wrong-answer': {'WA'},
+    'presentation-error': {'PE'},
+    'time-limit-exceeded': {'TL'},
+    'memory-limit-exceeded': {'ML'},
+    'failed': {'RE'},
+    'time-limit-exceeded-or-accepted': {'TL'},
+    'time-limit-exceeded-or-memory-limit-exceeded': {'TL', 'ML'},
+}
 
 
 class CheckException(Exception):
-    def __init__(self, msg: str=''):
+    def __init__(self, msg: str='', status: str='FL'):
         self.msg = msg
+        self.status = status
 
 
 class Test:
-    """iterator that returns tests in specified folder"""
+    """iterator that returns tests in specified folder
 
-    def __init__(self, folder, test_num):
+    Input and answer can be compressed (01.gz, 01.a.zst), inf_suffix and ans_suffix are their known compression
+    suffixes, tests found by TestSet get them from its index, otherwise files are looked up.
+    """
+
+    def __init__(self, folder, test_num, str_format=None, inf_suffix=None, ans_suffix=None):
         self.folder = folder
         self.test_num = test_num
-        if not os.path.exists(folder):
-            raise Exception('Folder with tests does not exists')
+        if str_format is None:
+            if not os.path.exists(folder):
+                raise Exception('Folder with tests does not exists')
+            str_format = Test.get_str_format()
+        self.str_format = str_format
+        self.inf_suffix = inf_suffix
+        self.ans_suffix = ans_suffix
+
+    @staticmethod
+    def get_str_format():
         name_width = cfg.get_problem_param('test_num_width') or str(DEFAULT_TEST_NUM_WIDTH)
-        self.str_format = '{:0>' + str(name_width) + 'd}'  # '{:0>2d}'
+        return '{:0>' + str(name_width) + 'd}'  # '{:0>2d}'
 
     def exists(self):
-        return os.path.exists(pjoin(self.folder, self.str_format.format(self.test_num)))
+        return os.path.exists(self.inf_path())
 
     def test_num_as_str(self):
         return self.str_format.format(self.test_num)
 
     def inf_path(self):
-        return pjoin(self.folder, self.str_format.format(self.test_num))
+        """path of the input file, compressed one if the test is compressed"""
+        path = pjoin(self.folder, self.inf_name())
+        return compression.find_file(path) if self.inf_suffix is None else path + self.inf_suffix
 
     def ans_path(self):
-        return pjoin(self.folder, (self.str_format + '.a').format(self.test_num))
+        """path of the answer file, compressed one if the test is compressed"""
+        path = pjoin(self.folder, self.ans_name())
+        return compression.find_file(path) if self.ans_suffix is None else path + self.ans_suffix
 
     def sample_inf_path(self, samples_folder):
         return pjoin(samples_folder, (self.str_format + '.t').format(self.test_num))
@@ -70,24 +131,137 @@ class Test:
         return (self.str_format + '.a').format(self.test_num)
 
     def open_inf(self, mode='r'):
+        """for reading returns binary file with decompressed input, it can be passed to stdin of a process"""
+        if 'r' in mode:
+            return compression.open_stdin(self.inf_path())
         return open(self.inf_path(), mode)
 
     def open_ans(self, mode='r'):
+        """for writing replaces the answer (compressed too) with a plain file"""
+        if 'r' in mode:
+            return compression.open_stdin(self.ans_path())
+        compression.remove_variants(pjoin(self.folder, self.ans_name()))
+        self.ans_suffix = ''
         return open(self.ans_path(), mode)
 
+    def compress(self, suffix):
+        """compresses plain input and answer of the test"""
+        if not compression.get_suffix(self.inf_path()):
+            self.inf_suffix = compression.get_suffix(compression.compress_file(self.inf_path(), suffix))
+        if os.path.exists(self.ans_path()) and not compression.get_suffix(self.ans_path()):
+            self.ans_suffix = compression.get_suffix(compression.compress_file(self.ans_path(), suffix))
+
     @staticmethod
     def test_gen(folder):
-        test_cnt = 1
-        while Test(folder, test_cnt).exists():
-            yield Test(folder, test_cnt)
-            test_cnt += 1
+        return iter(TestSet(folder))
 
-    @classmethod
-    def test_len(cls, folder):
-        test_cnt = 0
-        while cls(folder, test_cnt + 1).exists():
-            test_cnt += 1
-        return test_cnt
+    @staticmethod
+    def test_len(folder):
+        return len(TestSet(folder))
+
+
+class TestSet:
+    """tests of folder (01, 02, ... without gaps) found with a single scandir
+
+    Index with file names of inputs and answers is cached in tmp/ and rebuilt when mtime of the folder changes.
+    Index scanned within timestamp granularity of the last change of the folder is racy: files added in the same
+    tick don't change the mtime, so such index is rebuilt until the folder is old enough.
+    """
+
+    _indexes = {}  # (folder, mtime of folder) -> index, avoids reading the same index again
+
+    def __init__(self, folder):
+        self.folder = folder
+        try:
+            folder_mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            raise Exception('Folder with tests does not exists')
+        self.str_format = Test.get_str_format()
+
+        self.index = TestSet._indexes.get((folder, folder_mtime))
+        if self.index is None or not self.is_fresh(self.index, folder_mtime):
+            self.index = self.load_index(folder_mtime)
+            TestSet._indexes[(folder, folder_mtime)] = self.index
+
+    def get_index_path(self):
+        return pjoin('tmp', 'test_index.{0}.json'.format(os.path.normpath(self.folder).replace(os.sep, '_')))
+
+    def is_fresh(self, index, folder_mtime):
+        return index.get('version') == INDEX_VERSION and index['folder_mtime'] == folder_mtime and \
+            index['str_format'] == self.str_format and index['scan_time'] - folder_mtime > INDEX_RACY_WINDOW
+
+    def load_index(self, folder_mtime):
+        index_path = self.get_index_path()
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+            if self.is_fresh(index, folder_mtime):
+                return index
+        except (OSError, ValueError, KeyError):  # no index yet or broken one
+            pass
+
+        index = self.scan(folder_mtime)
+        try:
+            os.makedirs('tmp', exist_ok=True)
+            tmp_path = '{0}.{1}.tmp'.format(index_path, os.getpid())
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, index_path)
+        except OSError:  # index is only an optimization
+            pass
+        return index
+
+    def scan(self, folder_mtime):
+        scan_time = time.time_ns()  # before reading, files added during the scan make the index racy
+        with os.scandir(self.folder) as entries:
+            files = {entry.name for entry in entries if entry.is_file()}
+
+        def find(name):
+            """returns name of plain or compressed file"""
+            for suffix in ('',) + compression.COMPRESSED_SUFFIXES:
+                if name + suffix in files:
+                    return name + suffix
+            return None
+
+        # file names of input and answer of every test
+        tests = []
+        inf = find(self.str_format.format(1))
+        while inf is not None:
+            tests.append({'inf': inf, 'ans': find(self.str_format.format(len(tests) + 1) + '.a')})
+            inf = find(self.str_format.format(len(tests) + 1))
+        return {'version': INDEX_VERSION, 'folder_mtime': folder_mtime, 'scan_time': scan_time,
+                'str_format': self.str_format, 'tests': tests}
+
+    def __len__(self):
+        return len(self.index['tests'])
+
+    def __iter__(self):
+        for i, x in enumerate(self.index['tests']):
+            inf_suffix = compression.get_suffix(x['inf'])
+            ans_suffix = compression.get_suffix(x['ans']) if x['ans'] is not None else None
+            yield Test(self.folder, i + 1, self.str_format, inf_suffix, ans_suffix)
+
+
+def format_usage(res, prefix=''):
+    """formats CPU time and peak memory of execution result for logs"""
+    if res is None or res.cpu_time is None:
+        return ''
+    return ', {0}cpu = {1:.2f}, {0}mem = {2:.1f} MB'.format(prefix, res.cpu_time, res.max_rss / 1024)
+
+
+def get_solution_ex(path, target, ml):
+    return Executable(path, target, ml=ml, java_cds=cfg.get_problem_flag('java_cds'),
+                      interpreter_flags=cfg.get_problem_param('python_flags', True) or '',
+                      limit_backend=cfg.get_problem_param('limit_backend', True),
+                      output_limit=int(cfg.get_problem_param('ol', True) or DEFAULT_OL))
+
+
+def get_checker_ex():
+    """returns Executable of the checker or BuiltinChecker for checkers like 'builtin:tokens'"""
+    checker = cfg.get_problem_param('checker', True) or 'check.cpp'
+    if checkers.is_builtin(checker):
+        return checkers.BuiltinChecker(checker)
+    return Executable(os.path.normpath(checker), 'checker', True)
 
 
 def validate_single_test(test, validator_ex):
@@ -112,7 +286,8 @@ def validate_single_test(test, validator_ex):
     return score, status, msg
 
 
-def validate_tests(args=None):
+def validate_tests(args=None, tests=None):
+    """validates all tests or only given ones, returns [correct count, tests count, names of correct tests]"""
     validator_path = cfg.get_problem_param('validator', True) or 'validator.cpp'
     validator_path = os.path.normpath(validator_path)
 
@@ -123,23 +298,33 @@ def validate_tests(args=None):
     log_file_name = pjoin('tmp', 'log', '{}.log'.format(os.path.basename(validator_path)))
     write_log('\nValidating tests ({0})...'.format(datetime.datetime.today()), file=log_file_name)
 
+    if tests is None:
+        tests = list(TestSet('tests'))
+
     ok_count = 0
+    correct_tests = []
 
-    for t in Test.test_gen('tests'):
+    for t in tests:
         score, status, msg = validate_single_test(t, validator_ex)
 
         if status == 'IR':
             break
 
         ok_count += score
+        if status == 'OK':
+            correct_tests.append(t.inf_name())
         write_log('test {0}: {1}'.format(t.test_num_as_str(), msg))
 
-    tests_num = Test.test_len('tests')
+    tests_num = len(tests)
     write_log('correct {0} from {1}'.format(ok_count, tests_num), file=log_file_name,
               color=bcolors.OKGREEN if ok_count == tests_num else bcolors.WARNING)
     print('Validating complete\n')
 
-    return [ok_count, Test.test_len('tests')]
+    return [ok_count, tests_num, correct_tests]
+
+
+def get_test_inputs():
+    return {t.inf_name(): hash_test_file(t.inf_path()) for t in TestSet('tests')}
 
 
 def build_tests(args):
@@ -153,6 +338,10 @@ def build_tests(args):
     gen_work_dir = cfg.get_problem_param('gen_work_dir', True)
     gen_ex = Executable(gen_path, 'gen', True, work_dir=gen_work_dir)
 
+    # starts compilation of the validator together with others, validate_tests() will reuse it
+    validator_path = cfg.get_problem_param('validator', True) or 'validator.cpp'
+    validator_ex = Executable(os.path.normpath(validator_path), 'validator', True)
+
     ml = args['ml'] or cfg.get_problem_param('ml', True) or DEFAULT_ML
     ml = int(ml)  # because cfg.get_problem_param() returns string or None
 
@@ -166,38 +355,80 @@ def build_tests(args):
                   'No such file or directory: {0} ({1})'.format(main_solution, datetime.datetime.today()),
                   file=log_file_name, color=bcolors.FAIL)
         exit(1)
-    solution_ex = Executable(main_solution, 'main_solution', ml=ml)
+    solution_ex = get_solution_ex(main_solution, 'main_solution', ml)
 
-    write_log('\nGenerating tests ({})...'.format(datetime.datetime.today()), file=log_file_name)
+    manifest = BuildManifest()
+    if not args.get('incremental'):
+        manifest.reset()
 
-    if os.path.exists('tests'):
-        shutil.rmtree('tests')
-    os.mkdir('tests')
+    gen_key = gen_ex.get_build_key()
+    if manifest.gen_key == gen_key and os.path.exists('tests') and get_test_inputs() == manifest.get_inputs():
+        write_log('\nGenerator and tests are unchanged ({})'.format(datetime.datetime.today()), file=log_file_name)
+    else:
+        write_log('\nGenerating tests ({})...'.format(datetime.datetime.today()), file=log_file_name)
 
-    try:
-        gen_ex.finish_compilation()
-    except Exception as e:
-        write_log('Can\'t compile generator: {0} ({1})'.format(e.args, datetime.datetime.today()),
-                  file=log_file_name, color=bcolors.FAIL)
-        exit(1)
-    res = gen_ex.execute(args='0')
-    if res.returncode != 0:
-        raise Exception('Generator error')
+        # answers of the previous build are reused for tests with the same input
+        old_tests_path = pjoin('tmp', 'tests.old')
+        if os.path.exists(old_tests_path):
+            shutil.rmtree(old_tests_path)
+        if os.path.exists('tests'):
+            shutil.move('tests', old_tests_path)
+        os.mkdir('tests')
 
-    validate_tests()
+        try:
+            gen_ex.finish_compilation()
+        except Exception as e:
+            write_log('Can\'t compile generator: {0} ({1})'.format(e.args, datetime.datetime.today()),
+                      file=log_file_name, color=bcolors.FAIL)
+            exit(1)
+        res = gen_ex.execute(args='0')
+        if res.returncode != 0:
+            raise Exception('Generator error')
 
-    try:
-        solution_ex.finish_compilation()
-    except Exception as e:
-        write_log('Can\'t compile solution: {0} ({1})'.format(e.args, datetime.datetime.today()),
-                  file=log_file_name, color=bcolors.FAIL)
-        exit(1)
+        if os.path.exists(old_tests_path):
+            for t in TestSet('tests'):
+                old_ans_path = compression.find_file(pjoin(old_tests_path, t.ans_name()))
+                if os.path.exists(old_ans_path) and not os.path.exists(t.ans_path()):
+                    shutil.move(old_ans_path, pjoin('tests', os.path.basename(old_ans_path)))
+            shutil.rmtree(old_tests_path)
+        manifest.gen_key = gen_key
+
+    manifest.update_inputs(get_test_inputs())
+
+    validator_key = validator_ex.get_build_key()
+    changed_tests = [t for t in TestSet('tests')
+                     if manifest.get_test(t.inf_name()).get('validator') != validator_key]
+    if changed_tests:
+        for name in validate_tests(tests=changed_tests)[2]:
+            manifest.get_test(name)['validator'] = validator_key
+    else:
+        write_log('All tests are already validated', file=log_file_name)
+
+    solution_key = solution_ex.get_build_key()
+    changed_tests = set()
+    for t in TestSet('tests'):
+        record = manifest.get_test(t.inf_name())
+        if record.get('solution') != solution_key or record.get('ans') != hash_test_file(t.ans_path()):
+            changed_tests.add(t.inf_name())
+
+    if changed_tests:
+        try:
+            solution_ex.finish_compilation()
+        except Exception as e:
+            write_log('Can\'t compile solution: {0} ({1})'.format(e.args, datetime.datetime.today()),
+                      file=log_file_name, color=bcolors.FAIL)
+            exit(1)
 
     write_log('\nGenerating answers...', file=log_file_name)
 
-    for t in Test.test_gen('tests'):
+    for t in TestSet('tests'):
         write_log(('test ' + t.str_format + ': ').format(t.test_num), end="", file=log_file_name)
+        if t.inf_name() not in changed_tests:
+            write_log('Unchanged', file=log_file_name)
+            continue
 
+        record = manifest.get_test(t.inf_name())
+        record['solution'] = record['ans'] = None
         with t.open_inf('r') as inf, t.open_ans('w') as ans:
             res = solution_ex.execute(stdin=inf, stdout=ans)
 
@@ -205,7 +436,16 @@ def build_tests(args):
             write_log("Run-time error [{}]".format(res.returncode), file=log_file_name)
             continue
         else:
-            write_log("Generated, time = {0:.2f}".format(res.exec_time), file=log_file_name)
+            record['solution'] = solution_key
+            record['ans'] = hash_test_file(t.ans_path())
+            write_log("Generated, time = {0:.2f}{1}".format(res.exec_time, format_usage(res)), file=log_file_name)
+
+    if args.get('compress'):
+        write_log('\nCompressing tests...', file=log_file_name)
+        for t in TestSet('tests'):
+            t.compress('.' + args['compress'])
+
+    manifest.save()
 
     if cfg.get_problem_param('samples_num', True):
         samples_num = int(cfg.get_problem_param('samples_num'))
@@ -214,8 +454,8 @@ def build_tests(args):
             shutil.rmtree(samples_folder)
         os.mkdir(samples_folder)
         for i in range(1, samples_num + 1):
-            shutil.copy2(Test('tests', i).inf_path(), Test('tests', i).sample_inf_path(samples_folder))
-            shutil.copy2(Test('tests', i).ans_path(), Test('tests', i).sample_ans_path(samples_folder))
+            compression.copy_plain(Test('tests', i).inf_path(), Test('tests', i).sample_inf_path(samples_folder))
+            compression.copy_plain(Test('tests', i).ans_path(), Test('tests', i).sample_ans_path(samples_folder))
 
 
 def check_solution(args):
@@ -238,16 +478,15 @@ def check_solution(args):
                   file=log_file_name, color=bcolors.FAIL)
         return [0, 0]
 
-    sol_ex = Executable(solution, 'solution', ml=ml)
+    sol_ex = get_solution_ex(solution, 'solution', ml)
 
     checker_path = cfg.get_problem_param('checker', True) or 'check.cpp'
-    checker_path = os.path.normpath(checker_path)
-    if not os.path.exists(checker_path):
+    if not checkers.is_builtin(checker_path) and not os.path.exists(checker_path):
         write_log('Can\'t compile checker: '
                   'No such file or directory: {0} ({1})'.format(checker_path, datetime.datetime.today()),
                   file=log_file_name, color=bcolors.FAIL)
         return [0, 0]
-    check_ex = Executable(checker_path, 'checker', True)
+    check_ex = get_checker_ex()
 
     try:
         sol_ex.finish_compilation()
@@ -259,59 +498,348 @@ def check_solution(args):
 
     write_log('\nChecking solution {0} ({1})...'.format(solution, datetime.datetime.today()), file=log_file_name)
 
+    startup_time = sol_ex.get_startup_time()
+    if startup_time is not None:
+        write_log('JVM startup time = {0:.2f} (included in every test time)'.format(startup_time), file=log_file_name)
+
+    jobs = args.get('jobs') or 1
+    if jobs > 1:
+        write_log('Running {0} tests at once, times may be higher than with a single job'.format(jobs),
+                  file=log_file_name)
+
+    repeat = args.get('repeat') or 0
+    if repeat and jobs > 1:
+        write_log('Timing with several jobs is less accurate', file=log_file_name, color=bcolors.WARNING)
+
+    verdicts = VerdictCache()
+    run_test = make_test_runner(sol_ex, check_ex, tl, ml, get_scratch_paths(jobs), verdicts, args.get('force'),
+                                repeat)
+
+    history = FailureHistory()
+    solution_key = sol_ex.get_build_key()
+    fail_fast = args.get('fail_fast')
+    tests = list(TestSet('tests'))
+    if fail_fast:  # tests failed last time are likely to fail again
+        tests = history.order_tests(solution_key, tests)
+
     ok_count = 0
-    for t in Test.test_gen('tests'):
-        try:
-            time = 0
+    results = {}
+    test_results = []
+    all_timings = {}
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+    try:
+        # map() returns results in order of tests, so the log looks the same for any number of jobs
+        for t, res in zip(tests, pool.map(run_test, tests)):
+            ok_count += res.score
+            results[t.inf_name()] = res.status == 'OK'
+            test_results.append((t, res))
+            write_log(format_test_result(t, res))
+            if res.timings:
+                all_timings[t.test_num_as_str()] = res.timings
+            if fail_fast and res.status != 'OK':
+                write_log('Stopped after the first failed test', file=log_file_name)
+                break
+        pool.shutdown(cancel_futures=True)
+    except KeyboardInterrupt:
+        write_log('Interrupted')
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    history.update(solution_key, results)
+    history.save()
+    verdicts.save()
+
+    tests_num = len(tests)
+    write_log('passed {:d} from {:d}'.format(ok_count, tests_num), end='\n' if all_timings else '\n\n',
+              file=log_file_name, color=bcolors.OKGREEN if ok_count == tests_num else bcolors.WARNING)
+    if all_timings:
+        is_main = os.path.normpath(solution) == os.path.normpath(cfg.get_main_solution() or '')
+        write_timing_report(all_timings, tl, is_main, log_file_name)
+
+    report = reports.make_report(solution, datetime.datetime.today(), tl, ml, test_results)
+    reports.write_json(report, args.get('json') or pjoin('tmp', 'log', '{}.json'.format(os.path.basename(solution))))
+    if args.get('junit'):
+        reports.write_junit(report, args['junit'])
+
+    return [ok_count, tests_num]
+
+
+def format_test_result(t, res):
+    return 'test {0}: time = {2:.2f}{3}{4}, {1}{5}'.format(t.test_num_as_str(), res.msg, res.time,
+                                                          format_usage(res.sol_res), format_timings(res.timings),
+                                                          ' (cached)' if res.cached else '')
+
+
+def time_solution(t, sol_ex, tl, out_path, repeat):
+    """runs solution on the test repeat times, returns wall times of the runs"""
+    timings = []
+    try:
+        for i in range(repeat):
             try:
-                with t.open_inf('r') as inf, open(pjoin('tmp', 'problem.out'), 'w') as ouf:
-                    res = sol_ex.execute(stdin=inf, stdout=ouf, tl=tl)
-                    time = res.exec_time
+                with t.open_inf('r') as inf, open(out_path, 'w') as ouf:
+                    timings.append(sol_ex.execute(stdin=inf, stdout=ouf, tl=tl).exec_time)
             except subprocess.TimeoutExpired:
-                raise CheckException('Time-limit error ({} s.)'.format(tl))
+                timings.append(tl)
+    finally:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+    return timings
+
+
+def is_high_variance(timings):
+    spread = max(timings) - min(timings)
+    return spread > HIGH_VARIANCE_MIN_SPREAD and spread > HIGH_VARIANCE_RATIO * statistics.median(timings)
+
+
+def format_timings(timings):
+    """formats min/median/max of repeated runs for logs"""
+    if not timings:
+        return ''
+    return ', min = {0:.2f}, median = {1:.2f}, max = {2:.2f}{3}'.format(
+        min(timings), statistics.median(timings), max(timings), ' (high variance)' if is_high_variance(timings) else '')
+
+
+def write_timing_report(all_timings, tl, is_main, log_file_name):
+    slowest_test, timings = max(all_timings.items(), key=lambda x: statistics.median(x[1]))
+    slowest = statistics.median(timings)
+    noisy_tests = [name for name, x in all_timings.items() if is_high_variance(x)]
+
+    write_log('slowest test {0}: median = {1:.2f}, max = {2:.2f}, TL margin = {3:.2f} s.'.format(
+        slowest_test, slowest, max(timings), tl - max(timings)), file=log_file_name,
+        color=bcolors.WARNING if max(timings) * TL_SUGGESTION_FACTOR > tl else None)
+    if noisy_tests:
+        write_log('high variance of time on tests {0}'.format(', '.join(noisy_tests)), file=log_file_name,
+                  color=bcolors.WARNING)
+    if is_main:
+        suggested_tl = math.ceil(slowest * TL_SUGGESTION_FACTOR / TL_SUGGESTION_STEP) * TL_SUGGESTION_STEP
+        write_log('suggested TL = {0:g} s. ({1:g}x the slowest test)'.format(max(suggested_tl, TL_SUGGESTION_STEP),
+                                                                             TL_SUGGESTION_FACTOR),
+                  file=log_file_name)
+    write_log('', file=log_file_name)
+
+
+def get_scratch_paths(jobs):
+    """every running test gets its own scratch file for the output of the solution"""
+    out_paths = queue.Queue()
+    for i in range(jobs):
+        out_paths.put(pjoin('tmp', 'problem.out' if jobs == 1 else 'problem.{0}.out'.format(i)))
+    return out_paths
+
+
+def make_test_runner(sol_ex, check_ex, tl, ml, out_paths, verdicts, force=False, repeat=0):
+    """returns function checking the solution on a test, it can be called from several threads"""
+    # the checker isn't run for outputs identical to answers if the problem allows it
+    exact_match = isinstance(check_ex, checkers.BuiltinChecker) or cfg.get_problem_flag('checker_accepts_exact')
+    verdict_prefix = (sol_ex.get_build_key(), check_ex.get_build_key(), tl, ml, sol_ex.output_limit, exact_match)
+
+    def run_test(t):
+        key = get_verdict_key(*verdict_prefix + (hash_test_file(t.inf_path()), hash_test_file(t.ans_path())))
+        if not force and not repeat:
+            res = verdicts.get(key)
+            if res is not None:
+                return res
+
+        out_path = out_paths.get()
+        try:
+            res = check_single_test(t, sol_ex, check_ex, tl, ml, out_path, exact_match)
+            if repeat and res.status == 'OK':  # the checked run is a warm-up for timing
+                res = res._replace(timings=time_solution(t, sol_ex, tl, out_path, repeat))
+        finally:
+            out_paths.put(out_path)
+        if res.status != 'IR':
+            verdicts.put(key, res)
+        return res
 
-            if res.returncode != 0:
-                raise CheckException('Run-time error [{}]'.format(res.returncode))
+    return run_test
 
-            res = check_ex.execute(args=' '.join((t.inf_path(), pjoin('tmp', 'problem.out'), t.ans_path())),
-                                   stderr=subprocess.PIPE)
 
-            if res.returncode != 0:
-                raise CheckException('{} [{}]'.format(res.stderr, res.returncode))
+def check_single_test(t, sol_ex, check_ex, tl, ml, out_path=pjoin('tmp', 'problem.out'), exact_match=False):
+    """returns TestResult with status 'OK', 'TL', 'ML', 'OL', 'RE', 'WA', 'PE', 'FL' or 'IR'
 
-            os.remove(pjoin('tmp', 'problem.out'))
+    With exact_match output identical to the answer is accepted without running the checker.
+    """
+    time = 0
+    sol_res = None
+    output_size = None
+    try:
+        try:
+            with t.open_inf('r') as inf, open(out_path, 'w') as ouf:
+                res = sol_res = sol_ex.execute(stdin=inf, stdout=ouf, tl=tl)
+                time = res.exec_time
+            output_size = os.path.getsize(out_path)
+        except subprocess.TimeoutExpired:
+            time = tl  # the solution was killed at the time limit
+            raise CheckException('Time-limit error ({} s.)'.format(tl), 'TL')
+
+        if res.oom_killed:
+            raise CheckException('Memory-limit error ({} MB)'.format(ml), 'ML')
+
+        if res.output_limit_exceeded:
+            raise CheckException('Output-limit error', 'OL')
+
+        if res.returncode != 0:
+            raise CheckException('Run-time error [{}]'.format(res.returncode), 'RE')
+
+        if exact_match and compression.files_equal(out_path, t.ans_path()):
+            return TestResult(1, 'OK', 'OK (exact match)', time, sol_res, output_size)
+
+        if isinstance(check_ex, checkers.BuiltinChecker):
+            # builtin checkers don't read the input and map the answer, so only it is unpacked to a regular file
+            with compression.plain_file(t.ans_path(), out_path + '.ans') as ans_path:
+                res = check_ex.execute(args=[t.inf_path(), out_path, ans_path], stderr=subprocess.PIPE)
+        else:
+            # compressed tests are streamed to the checker through pipes instead of being unpacked to disk
+            with compression.pipe_file(t.inf_path(), out_path + '.inf') as (inf_path, inf_fds), \
+                    compression.pipe_file(t.ans_path(), out_path + '.ans') as (ans_path, ans_fds):
+                res = check_ex.execute(args=[inf_path, out_path, ans_path], stderr=subprocess.PIPE,
+                                       pass_fds=inf_fds + ans_fds)
 
-        except KeyboardInterrupt:
-            msg = 'Interrupted'
-            break
+        if res.returncode != 0:
+            raise CheckException('{} [{}]'.format(res.stderr, res.returncode),
+                                 CHECKER_STATUSES.get(res.returncode, 'FL'))
 
-        except CheckException as ce:
-            msg = ce.msg
-        else:
-            msg = '{}'.format(res.stderr) if res.stderr else 'OK'
-            ok_count += 1
-        finally:
-            if os.path.exists(pjoin('tmp', 'problem.out')):
-                os.remove(pjoin('tmp', 'problem.out'))
-            write_log('test {0}: time = {2:.2f}, {1}'.format(t.test_num_as_str(), msg, time))
+    except KeyboardInterrupt:
+        return TestResult(0, 'IR', 'Interrupted', time, sol_res, output_size)
 
-    tests_num = Test.test_len('tests')
-    write_log('passed {:d} from {:d}'.format(ok_count, tests_num), end='\n\n', file=log_file_name,
-              color=bcolors.OKGREEN if ok_count == tests_num else bcolors.WARNING)
+    except CheckException as ce:
+        return TestResult(0, ce.status, ce.msg, time, sol_res, output_size)
 
-    return [ok_count, tests_num]
+    finally:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+
+    return TestResult(1, 'OK', '{}'.format(res.stderr) if res.stderr else 'OK', time, sol_res, output_size)
+
+
+def get_tag_verdicts(tag):
+    """returns verdicts allowed for solution with the tag (None if any) and verdicts expected at least once"""
+    if tag in ('main', 'accepted'):
+        return {'OK'}, None
+    if tag == 'rejected':
+        return None, FAILURE_STATUSES
+    if tag in TAG_VERDICTS:
+        expected = TAG_VERDICTS[tag]
+        return expected | {'OK'}, expected if tag != 'time-limit-exceeded-or-accepted' else None
+    return None, None
+
+
+def check_tag(tag, statuses):
+    """returns description of contradiction between verdicts of solution and its tag or None"""
+    allowed, expected = get_tag_verdicts(tag)
+    unexpected = sorted(set(statuses) - allowed - {'--'}) if allowed is not None else []
+    if unexpected:
+        return 'unexpected {0}'.format(', '.join(unexpected))
+    if expected is not None and not expected & set(statuses):
+        return 'expected {0}'.format(' or '.join(sorted(expected)))
+    return None
 
 
 def check_all_solutions(args):
+    tl = float(args['tl'] or cfg.get_problem_param('tl', True) or DEFAULT_TL)
+    ml = int(args['ml'] or cfg.get_problem_param('ml', True) or DEFAULT_ML)
     solutions = cfg.get_solutions()
 
-    results = []
-    for sol in solutions:
-        args.update({'solution': sol[1]})
-        results.append(check_solution(args))
+    checker_path = cfg.get_problem_param('checker', True) or 'check.cpp'
+    if not checkers.is_builtin(checker_path) and not os.path.exists(checker_path):
+        write_log('Can\'t compile checker: No such file or directory: {0}'.format(checker_path), color=bcolors.FAIL)
+        return
+
+    # starts all compilations at once, the same checker is used for all solutions
+    check_ex = get_checker_ex()
+    sol_exs = {path: get_solution_ex(path, name, ml) for name, path in solutions if os.path.exists(path)}
+    check_ex.finish_compilation()
 
-    for sol, res in zip(solutions, results):
-        print('{} ({}): [{} / {}]'.format(sol[0], sol[1], res[0], res[1]))
+    tests = list(TestSet('tests'))
+    jobs = args.get('jobs') or 1
+    out_paths = get_scratch_paths(jobs)
+    verdicts = VerdictCache()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+
+    # the whole solutions x tests matrix is scheduled at once
+    rows = []
+    for name, path in solutions:
+        tag = cfg.get_solution_tag(path)
+        if path not in sol_exs:
+            rows.append((name, path, tag, 'No such file', []))
+            continue
+        try:
+            sol_exs[path].finish_compilation()
+        except Exception as e:
+            rows.append((name, path, tag, 'Compilation error {0}'.format(e.args), []))
+            continue
+
+        run_test = make_test_runner(sol_exs[path], check_ex, tl, ml, out_paths, verdicts, args.get('force'))
+        futures = [pool.submit(run_test, t) for t in tests]
+        expected = get_tag_verdicts(tag)[1]
+        if expected is not None:
+            # other tests of the solution aren't needed after its expected verdict
+            def stop_early(future, futures=futures, expected=expected):
+                if not future.cancelled() and future.exception() is None and future.result().status in expected:
+                    for x in futures:
+                        x.cancel()
+
+            for future in futures:
+                future.add_done_callback(stop_early)
+        rows.append((name, path, tag, None, futures))
+
+    os.makedirs(pjoin('tmp', 'log'), exist_ok=True)
+    history = FailureHistory()
+    try:
+        results = []
+        for name, path, tag, error, futures in rows:
+            test_results = [(t, x.result()) for t, x in zip(tests, futures) if not x.cancelled()]
+            results.append(test_results)
+            if not test_results:
+                continue
+
+            # the same log as check writes, the console gets only the matrix
+            log_file_name = pjoin('tmp', 'log', '{}.log'.format(os.path.basename(path)))
+            write_log('\nChecking solution {0} ({1})...'.format(path, datetime.datetime.today()),
+                      file=log_file_name, write_to_stdout=False)
+            for t, res in test_results:
+                write_log(format_test_result(t, res), file=log_file_name, write_to_stdout=False)
+            if len(test_results) < len(tests):
+                write_log('Stopped after the expected verdict', file=log_file_name, write_to_stdout=False)
+            write_log('passed {:d} from {:d}'.format(sum(res.score for t, res in test_results), len(tests)),
+                      end='\n\n', file=log_file_name, write_to_stdout=False)
+
+            history.update(sol_exs[path].get_build_key(), {t.inf_name(): res.status == 'OK'
+                                                           for t, res in test_results if res.status != 'IR'})
+            report = reports.make_report(path, datetime.datetime.today(), tl, ml, test_results)
+            reports.write_json(report, pjoin('tmp', 'log', '{}.json'.format(os.path.basename(path))))
+        pool.shutdown()
+    except KeyboardInterrupt:
+        write_log('Interrupted')
+        pool.shutdown(wait=False, cancel_futures=True)
+        return
+    finally:
+        history.save()
+    verdicts.save()
+
+    write_solutions_matrix(rows, results, tests)
+
+
+def write_solutions_matrix(rows, results, tests):
+    names = ['{0} [{1}]'.format(name, tag) if tag else name for name, path, tag, error, futures in rows]
+    name_width = max([len(x) for x in names] + [0])
+    cell_widths = [max(len(t.test_num_as_str()), 2) for t in tests]
+
+    print('\n' + ' ' * name_width + ' ' + ' '.join(t.test_num_as_str().rjust(w) for t, w in zip(tests, cell_widths)))
+    for name, (sol_name, path, tag, error, futures), test_results in zip(names, rows, results):
+        if error:
+            write_log('{0} {1}'.format(name.ljust(name_width), error), color=bcolors.FAIL)
+            continue
+
+        statuses = {t.inf_name(): res.status for t, res in test_results}
+        cells = [statuses.get(t.inf_name(), '--') for t in tests]
+        ok_count = cells.count('OK')
+        contradiction = check_tag(tag, cells)
+        line = '{0} {1}  [{2} / {3}]'.format(name.ljust(name_width),
+                                            ' '.join(x.rjust(w) for x, w in zip(cells, cell_widths)),
+                                            ok_count, len(tests))
+        if contradiction:
+            write_log('{0} contradicts tag: {1}'.format(line, contradiction), color=bcolors.FAIL)
+        else:
+            write_log(line, color=bcolors.OKGREEN if tag or ok_count == len(tests) else None)
 
 
 def stress_test(args):
@@ -322,103 +850,426 @@ def stress_test(args):
     ml = args['ml'] or cfg.get_problem_param('ml', True) or DEFAULT_ML
     ml = int(ml)  # because cfg.get_problem_param() returns string or None
 
+    user_solution_paths = [args['solution']] + (args.get('also') or [])
     model_solution_path = args['model_solution'] or cfg.get_main_solution()
-    user_solution_path = args['solution']
 
     gen_path = cfg.get_problem_param('gen', True) or 'gen.cpp'
     gen_path = os.path.normpath(gen_path)
 
-    checker_path = cfg.get_problem_param('checker', True) or 'check.cpp'
-    checker_path = os.path.normpath(checker_path)
+    hunt = args.get('hunt_tl')
+    if hunt and args.get('batch'):
+        raise Exception('Batch generator can\'t be used for hunting slow tests')
+    if hunt and len(user_solution_paths) > 1:
+        raise Exception('Slow tests can be hunted only for a single solution')
 
     gen_ex = Executable(gen_path, 'gen', True)
-    check_ex = Executable(checker_path, 'checker', True)
-    m_sol_ex = Executable(model_solution_path, 'model_solution', ml=ml)
-    u_sol_ex = Executable(user_solution_path, 'user_solution', ml=ml)
+    u_sol_exs = [get_solution_ex(path, 'user_solution', ml) for path in user_solution_paths]
+    if not hunt:  # only the time of the user solution matters while hunting
+        check_ex = get_checker_ex()
+        m_sol_ex = get_solution_ex(model_solution_path, 'model_solution', ml)
 
     gen_ex.finish_compilation()
-    check_ex.finish_compilation()
-    m_sol_ex.finish_compilation()
-    u_sol_ex.finish_compilation()
+    for u_sol_ex in u_sol_exs:
+        u_sol_ex.finish_compilation()
+    if not hunt:
+        check_ex.finish_compilation()
+        m_sol_ex.finish_compilation()
 
     if os.path.exists('stress_tests'):
         shutil.rmtree('stress_tests')
     os.mkdir('stress_tests')
 
+    # every solution gets its own folder of failed tests if there are several ones
+    names = get_solution_names(user_solution_paths)
+    save_dirs = ['stress_tests'] if len(names) == 1 else [pjoin('stress_tests', name) for name in names]
+    for save_dir in save_dirs:
+        os.makedirs(save_dir, exist_ok=True)
+
     if not os.path.exists(pjoin('tmp', 'log')):
         os.mkdir(pjoin('tmp', 'log'))
-    log_file_name = pjoin('tmp', 'log', 'stress_{}.log'.format(os.path.basename(user_solution_path)))
+    log_file_name = pjoin('tmp', 'log', 'stress_{}.log'.format('_'.join(names)))
     write_log('\nStart stress testing({})...'.format(datetime.datetime.today()), file=log_file_name)
 
+    # seeds of tests depend only on the master seed and the test number, not on the number of jobs
+    master_seed = args.get('seed')
+    if master_seed is None:
+        master_seed = random.randrange(MAX_SEED)
+    seeds = random.Random(master_seed)
+    write_log('master seed = {0} (use --seed {0} to repeat)'.format(master_seed), file=log_file_name)
+
+    jobs = args.get('jobs') or 1
+    batch = args.get('batch')
+    stress_root = pjoin('tmp', 'stress')
+    if args.get('in_memory'):
+        if os.path.isdir(MEMORY_FS):
+            stress_root = tempfile.mkdtemp(prefix='olymper-stress-', dir=MEMORY_FS)
+        else:
+            write_log('{0} isn\'t available, scratch files are kept on disk'.format(MEMORY_FS), file=log_file_name,
+                      color=bcolors.WARNING)
+    work_dirs = get_stress_dirs(stress_root, jobs)
+
+    if hunt:
+        try:
+            return hunt_slow_tests(args, gen_ex, u_sol_exs[0], tl, seeds, jobs, work_dirs, log_file_name)
+        finally:
+            shutil.rmtree(stress_root, ignore_errors=True)
+
+    batch_gen = None
+    if batch:
+        write_log('Generating {0} tests per generator run'.format(batch), file=log_file_name)
+        batch_gen = BatchGenerator(gen_path, pjoin(stress_root, 'batch'), batch, seeds, STRESS_PREFETCH * jobs)
+
+    def run_test(cur_test, seed, data):
+        work_dir = work_dirs.get()
+        try:
+            return stress_single_test(cur_test, seed, work_dir, gen_ex, m_sol_ex, u_sol_exs, check_ex, mtl, tl, ml,
+                                      save_dirs, data)
+        finally:
+            work_dirs.put(work_dir)
+
     n = args['num'] or -1
     cur_test = 0
-    ok_count = 0
+    done_count = 0
+    ok_counts = [0] * len(u_sol_exs)
+
+    # a few tests are submitted ahead, results are logged in order of tests
+    running = collections.deque()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+    try:
+        while True:
+            while len(running) < STRESS_PREFETCH * jobs and (cur_test < n or n == -1):
+                cur_test += 1
+                seed, data = batch_gen.get() if batch_gen is not None else (seeds.randrange(MAX_SEED), None)
+                running.append((cur_test, seed, pool.submit(run_test, cur_test, seed, data)))
+            if not running:
+                break
+
+            num, seed, future = running.popleft()
+            m_time, results = future.result()
+            done_count += 1
+            for i, (ok, msg, u_time, u_res) in enumerate(results):
+                ok_counts[i] += ok
+                write_log('test {0:0>4d}{6}: m_time = {2:.2f}, u_time = {3:.2f}{4}, {1}{5}'.format(
+                    num, msg, m_time, u_time, format_usage(u_res, 'u_'),
+                    '' if ok else ' ({0})'.format(format_seed(seed)),
+                    ' [{0}]'.format(names[i]) if len(names) > 1 else ''))
+    except KeyboardInterrupt:
+        write_log('Interrupted')
+    finally:
+        # also on errors, running tests are finished before their scratch files are removed
+        pool.shutdown(cancel_futures=True)
+        if batch_gen is not None:
+            batch_gen.stop()
+        shutil.rmtree(stress_root, ignore_errors=True)
+
+    if len(names) == 1:
+        write_log('passed {:d} from {:d}'.format(ok_counts[0], done_count), end='\n\n', file=log_file_name)
+    else:
+        for name, ok_count in zip(names, ok_counts):
+            write_log('{0}: passed {1:d} from {2:d}'.format(name, ok_count, done_count), file=log_file_name,
+                      color=bcolors.OKGREEN if ok_count == done_count else bcolors.WARNING)
+        write_log('', file=log_file_name)
+
+    return [sum(ok_counts), done_count * len(names)]
 
-    while cur_test < n or n == -1:
-        cur_test += 1
 
-        for suf in ['in', 'out', 'ans']:
-            if os.path.exists(pjoin('tmp', 'problem.' + suf)):
-                os.remove(pjoin('tmp', 'problem.' + suf))
+def get_solution_names(paths):
+    """short unique names of solutions for logs and folders, paths are used if base names are the same"""
+    names = [os.path.basename(path) for path in paths]
+    if len(set(names)) < len(names):
+        names = [os.path.normpath(path).replace(os.sep, '_') for path in paths]
+    return names
 
-        files = {'inf': pjoin('tmp', 'problem.in')}
 
+def format_seed(seed):
+    """seed is a number or description of a batch generator run"""
+    return 'seed = {0}'.format(seed) if isinstance(seed, int) else seed
+
+
+def get_stress_dirs(root, jobs):
+    """every running stress test gets its own scratch directory in root"""
+    work_dirs = queue.Queue()
+    for i in range(jobs):
+        work_dir = pjoin(root, str(i))
+        os.makedirs(work_dir, exist_ok=True)
+        work_dirs.put(work_dir)
+    return work_dirs
+
+
+def hunt_slow_tests(args, gen_ex, u_sol_ex, tl, seeds, jobs, work_dirs, log_file_name):
+    """searches for inputs maximizing time of the user solution (CPU time where available), returns [0, tests count]
+
+    Generator is run as 'gen 2 <seed> <params>', params from --gen-params are upper bounds of numeric parameters.
+    Every test mutates the seed and params of the slowest test found so far (hill climbing), HUNT_KEEP slowest inputs
+    are kept in stress_tests/ with their generator arguments in NNNN.args.
+    """
+    max_params = [parse_number(x) for x in (args.get('gen_params') or '').split()]
+    write_log('Hunting slow tests, generator params are at most {0}'.format(max_params), file=log_file_name)
+    if jobs > 1:
+        write_log('Timing with several jobs is less accurate', file=log_file_name, color=bcolors.WARNING)
+
+    def run_test(gen_args, threshold):
+        work_dir = work_dirs.get()
+        try:
+            return hunt_single_test(gen_args, work_dir, gen_ex, u_sol_ex, tl, threshold)
+        finally:
+            work_dirs.put(work_dir)
+
+    n = args['num'] or -1
+    cur_test = 0
+    best_time, best_params = -1, max_params
+    slowest = []  # (time, test number, generator args) sorted by time descending
+
+    running = collections.deque()
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+    try:
+        while True:
+            while len(running) < STRESS_PREFETCH * jobs and (cur_test < n or n == -1):
+                cur_test += 1
+                params = max_params if cur_test == 1 else mutate_gen_params(best_params, max_params, seeds)
+                gen_args = ' '.join(['2', str(seeds.randrange(MAX_SEED))] + [str(x) for x in params])
+                threshold = slowest[-1][0] if len(slowest) == HUNT_KEEP else -1
+                running.append((cur_test, params, gen_args, pool.submit(run_test, gen_args, threshold)))
+            if not running:
+                break
+
+            num, params, gen_args, future = running.popleft()
+            time, msg, u_res, data = future.result()
+            if time > best_time:
+                best_time, best_params = time, params
+            if data is not None and (len(slowest) < HUNT_KEEP or time > slowest[-1][0]):
+                save_slow_test(num, gen_args, data)
+                slowest.append((time, num, gen_args))
+                slowest.sort(reverse=True)
+                if len(slowest) > HUNT_KEEP:
+                    remove_slow_test(slowest.pop()[1])
+            write_log('test {0:0>4d}: u_time = {1:.2f}{2}, gen {3}, {4}{5}'.format(
+                num, time, format_usage(u_res, 'u_'), gen_args, msg, ' (slowest)' if time == best_time else ''))
+    except KeyboardInterrupt:
+        write_log('Interrupted')
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    write_log('Slowest tests:', file=log_file_name)
+    for time, num, gen_args in slowest:
+        write_log('{0:0>4d}: u_time = {1:.2f}, gen {2}'.format(num, time, gen_args), file=log_file_name,
+                  color=bcolors.WARNING if time >= tl else None)
+    write_log('', file=log_file_name)
+
+    return [0, cur_test]
+
+
+def parse_number(s):
+    try:
+        return int(s)
+    except ValueError:
+        pass
+    try:
+        return float(s)
+    except ValueError:
+        raise Exception('Generator params must be numbers ({0})'.format(s))
+
+
+def mutate_gen_params(params, max_params, rng):
+    """changes every param with probability 1/2 by a random factor, keeps integers in [1, max param] and floats
+    in [0, max param]"""
+    res = []
+    for x, max_x in zip(params, max_params):
+        if rng.random() < 0.5:
+            x *= rng.uniform(HUNT_MIN_FACTOR, HUNT_MAX_FACTOR)
+            if isinstance(max_x, int):
+                x = min(max_x, max(1, round(x) + rng.choice((-1, 1))))
+            else:
+                x = min(max_x, max(0.0, x))
+        res.append(x)
+    return res
+
+
+def hunt_single_test(gen_args, work_dir, gen_ex, u_sol_ex, tl, threshold):
+    """returns time of the user solution (tl for time-limit errors), message, its ExecResult and the input
+    if the time is greater than threshold (None otherwise)"""
+    inf_path = pjoin(work_dir, 'problem.in')
+    out_path = pjoin(work_dir, 'problem.out')
+    with open(inf_path, 'w') as inf:
+        res = gen_ex.execute(args=gen_args, stdout=inf)
+    if not res.returncode == 0:
+        raise Exception('Generator error (gen {0})'.format(gen_args))
+
+    u_res = None
+    try:
+        with open(inf_path, 'r') as inf, open(out_path, 'w') as ouf:
+            res = u_res = u_sol_ex.execute(stdin=inf, stdout=ouf, tl=tl)
+        time = res.cpu_time if res.cpu_time is not None else res.exec_time
+        if res.returncode != 0:
+            msg = 'Run-time error [{}]'.format(res.returncode)
+        else:
+            msg = 'OK'
+    except subprocess.TimeoutExpired:
+        time = tl
+        msg = 'Time-limit error ({} s.)'.format(tl)
+
+    data = None
+    if time > threshold:
+        with open(inf_path, 'rb') as f:
+            data = f.read()
+    return time, msg, u_res, data
+
+
+def save_slow_test(num, gen_args, data):
+    with open(pjoin('stress_tests', '{0:0>4d}'.format(num)), 'wb') as f:
+        f.write(data)
+    with open(pjoin('stress_tests', '{0:0>4d}.args'.format(num)), 'w') as f:
+        print(gen_args, file=f)
+
+
+def remove_slow_test(num):
+    for suf in ('', '.args'):
+        os.remove(pjoin('stress_tests', '{0:0>4d}{1}'.format(num, suf)))
+
+
+class BatchGenerator:
+    """runs generator as 'gen 3 <seed> <count>' in work_dir, it writes tests 1, 2, ..., count there like testlib
+    startTest(); tests are read ahead by a thread into a queue of limited size
+
+    Instead of a seed every test gets the generator run reproducing it, like 'gen 3 <seed> <count>, test <i>'.
+    """
+
+    def __init__(self, gen_path, work_dir, count, seeds, prefetch):
+        os.makedirs(work_dir, exist_ok=True)
+        self.gen_ex = Executable(gen_path, 'gen', True, work_dir=work_dir)
+        self.work_dir = work_dir
+        self.count = count
+        self.seeds = seeds
+        self.inputs = queue.Queue(maxsize=max(count, prefetch))
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                seed = self.seeds.randrange(MAX_SEED)
+                res = self.gen_ex.execute(args='3 "{0}" {1}'.format(seed, self.count))
+                if res.returncode != 0:
+                    raise Exception('Generator error (seed = {0})'.format(seed))
+
+                for i in range(1, self.count + 1):
+                    path = pjoin(self.work_dir, str(i))
+                    if not os.path.exists(path):
+                        raise Exception('Generator hasn\'t written test {0} (seed = {1})'.format(i, seed))
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    os.remove(path)
+                    self.put(('gen 3 {0} {1}, test {2}'.format(seed, self.count, i), data))
+        except Exception as e:
+            self.put(e)
+
+    def put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.inputs.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def get(self):
+        """returns seed and input of the next test"""
+        item = self.inputs.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+def stress_single_test(cur_test, seed, work_dir, gen_ex, m_sol_ex, u_sol_exs, check_ex, mtl, tl, ml, save_dirs,
+                       data=None):
+    """runs one iteration of stress testing in work_dir, returns m_time and (ok, msg, u_time, u_res) of every
+    user solution
+
+    Input is generated here unless data of a batch generator is given, it and the answer of the model solution
+    are shared by all user solutions. Files of a test failed by a solution are saved to its folder of save_dirs
+    together with the seed. Scratch files aren't removed, the next test in work_dir overwrites them.
+    """
+    files = {'inf': pjoin(work_dir, 'problem.in')}
+
+    if data is not None:
+        with open(files['inf'], 'wb') as inf:
+            inf.write(data)
+    else:
         with open(files['inf'], 'w') as inf:
-            res = gen_ex.execute(args='2 "{}"'.format(random.randint(0, 10 ** 18)), stdout=inf)
+            res = gen_ex.execute(args='2 "{}"'.format(seed), stdout=inf)
         if not res.returncode == 0:
-            raise Exception('Generator error')
+            raise Exception('Generator error (seed = {0})'.format(seed))
 
+    m_time = 0
+    try:
+        files['ans'] = pjoin(work_dir, 'problem.ans')
         try:
-            files['ans'] = pjoin('tmp', 'problem.ans')
-            m_time = u_time = 0
-            try:
-                with open(files['inf'], 'r') as inf, open(files['ans'], 'w') as ans:
-                    res = m_sol_ex.execute(stdin=inf, stdout=ans, tl=mtl)
-                    m_time = res.exec_time
-            except subprocess.TimeoutExpired:
-                raise CheckException('Time-limit error at model solution ({} s.)'.format(mtl))
+            with open(files['inf'], 'r') as inf, open(files['ans'], 'w') as ans:
+                res = m_sol_ex.execute(stdin=inf, stdout=ans, tl=mtl)
+                m_time = res.exec_time
+        except subprocess.TimeoutExpired:
+            raise CheckException('Time-limit error at model solution ({} s.)'.format(mtl))
 
-            if res.returncode != 0:
-                raise CheckException('Run-time error at model solution [{}]'.format(res.returncode))
+        if res.returncode != 0:
+            raise CheckException('Run-time error at model solution [{}]'.format(res.returncode))
 
-            files['out'] = pjoin('tmp', 'problem.out')
+    except CheckException as ce:  # fails the test for every solution
+        for save_dir in save_dirs:
+            save_stress_test(save_dir, cur_test, seed, files)
+        return m_time, [(False, ce.msg, 0, None)] * len(u_sol_exs)
 
-            try:
-                with open(files['inf'], 'r') as inf, open(files['out'], 'w') as ans:
-                    res = u_sol_ex.execute(stdin=inf, stdout=ans, tl=tl)
-                    u_time = res.exec_time
-            except subprocess.TimeoutExpired:
-                raise CheckException('Time-limit error ({} s.)'.format(tl))
+    results = []
+    for i, (u_sol_ex, save_dir) in enumerate(zip(u_sol_exs, save_dirs)):
+        out_path = pjoin(work_dir, 'problem.out' if len(u_sol_exs) == 1 else 'problem.{0}.out'.format(i))
+        res = stress_solution(files['inf'], out_path, files['ans'], u_sol_ex, check_ex, tl, ml)
+        if not res[0]:
+            save_stress_test(save_dir, cur_test, seed, dict(files, out=out_path))
+        results.append(res)
+    return m_time, results
+
+
+def stress_solution(inf_path, out_path, ans_path, u_sol_ex, check_ex, tl, ml):
+    """runs user solution on the input and checks its output, returns (ok, msg, u_time, u_res)"""
+    u_time = 0
+    u_res = None
+    try:
+        try:
+            with open(inf_path, 'r') as inf, open(out_path, 'w') as ouf:
+                res = u_res = u_sol_ex.execute(stdin=inf, stdout=ouf, tl=tl)
+                u_time = res.exec_time
+        except subprocess.TimeoutExpired:
+            raise CheckException('Time-limit error ({} s.)'.format(tl))
 
-            if res.returncode != 0:
-                raise CheckException('Run-time error [{}]'.format(res.returncode))
+        if res.oom_killed:
+            raise CheckException('Memory-limit error ({} MB)'.format(ml))
 
-            res = check_ex.execute(args=' '.join([files['inf'], files['out'], files['ans']]),
-                                   stderr=subprocess.PIPE)
+        if res.output_limit_exceeded:
+            raise CheckException('Output-limit error')
 
-            if res.returncode != 0:
-                raise CheckException('{} [{}]'.format(res.stderr, res.returncode))
+        if res.returncode != 0:
+            raise CheckException('Run-time error [{}]'.format(res.returncode))
 
-        except KeyboardInterrupt:
-            msg = 'Interrupted'
-            break
+        res = check_ex.execute(args=' '.join([inf_path, out_path, ans_path]), stderr=subprocess.PIPE)
 
-        except CheckException as ce:
-            msg = ce.msg
-            for name, suf in (('inf', ''), ('out', '.out'), ('ans', '.a')):
-                if name in files and os.path.exists(files[name]):
-                    shutil.copy2(files[name], pjoin('stress_tests', '{0:0>4d}{1}'.format(cur_test, suf)))
-        else:
-            msg = '{}'.format(res.stderr) if res.stderr else 'OK'
-            ok_count += 1
-        finally:
-            for file in files.values():
-                os.remove(file)
-            write_log('test {0:0>4d}: m_time = {2:.2f}, u_time = {3:.2f}, {1}'.format(cur_test, msg, m_time, u_time))
+        if res.returncode != 0:
+            raise CheckException('{} [{}]'.format(res.stderr, res.returncode))
+
+    except CheckException as ce:
+        return False, ce.msg, u_time, u_res
+
+    return True, '{}'.format(res.stderr) if res.stderr else 'OK', u_time, u_res
 
-    write_log('passed {:d} from {:d}'.format(ok_count, n), end='\n\n', file=log_file_name)
 
-    return [ok_count, n]
+def save_stress_test(save_dir, cur_test, seed, files):
+    for name, suf in (('inf', ''), ('out', '.out'), ('ans', '.a')):
+        if name in files and os.path.exists(files[name]):
+            shutil.copy2(files[name], pjoin(save_dir, '{0:0>4d}{1}'.format(cur_test, suf)))
+    with open(pjoin(save_dir, '{0:0>4d}.seed'.format(cur_test)), 'w') as f:
+        print(seed, file=f)
 
 
 def build_st(args):
@@ -453,7 +1304,9 @@ def upload(args):
         ftp.cwd(cfg.get_server_contest_path() + 'problems/' + (
             cfg.get_problem_param('system name') or cfg.get_problem_param('system_name')))
 
-        if args['checker']:
+        if args['checker'] and checkers.is_builtin(cfg.get_problem_param('checker', True) or ''):
+            print('Builtin checker can\'t be uploaded, set a standard checker on the server')
+        elif args['checker']:
             print('Uploading checker')
             checker_path = cfg.get_problem_param('checker', True) or 'check.cpp'
             checker_path = os.path.normpath(checker_path)
@@ -477,11 +1330,11 @@ def upload(args):
 
         if args['tests']:
             print('Uploading tests')
-            for t in Test.test_gen('tests'):
+            for t in TestSet('tests'):
                 print('uploading {} and {}'.format(t.inf_name(), t.ans_name()))
-                with open(t.inf_path(), 'rb') as f:
+                with compression.open_read(t.inf_path()) as f:
                     ftp.storbinary('STOR tests/{}'.format(t.inf_name()), f)
-                with open(t.ans_path(), 'rb') as f:
+                with compression.open_read(t.ans_path()) as f:
                     ftp.storbinary('STOR tests/{}'.format(t.ans_name()), f)
 
         if args['statement']:
@@ -521,7 +1374,9 @@ def upload_ssh(args):
         path_prefix = cfg.get_server_contest_path() + 'problems/' + (
             cfg.get_problem_param('system name') or cfg.get_problem_param('system_name'))
 
-        if args['checker']:
+        if args['checker'] and checkers.is_builtin(cfg.get_problem_param('checker', True) or ''):
+            print('Builtin checker can\'t be uploaded, set a standard checker on the server')
+        elif args['checker']:
             print('Uploading checker')
             checker_path = cfg.get_problem_param('checker', True) or 'check.cpp'
             checker_path = os.path.normpath(checker_path)
@@ -544,11 +1399,14 @@ def upload_ssh(args):
 
         if args['tests']:
             print('Uploading tests')
-            for t in Test.test_gen('tests'):
+            for t in TestSet('tests'):
                 print('uploading {} and {}'.format(t.inf_name(), t.ans_name()))
 
-                scp.put(t.inf_path(), os.path.join(path_prefix, 'tests', t.inf_name()))
-                scp.put(t.ans_path(), os.path.join(path_prefix, 'tests', t.ans_name()))
+                # the server gets plain tests
+                with compression.plain_file(t.inf_path(), pjoin('tmp', 'upload.inf')) as inf_path, \
+                        compression.plain_file(t.ans_path(), pjoin('tmp', 'upload.ans')) as ans_path:
+                    scp.put(inf_path, os.path.join(path_prefix, 'tests', t.inf_name()))
+                    scp.put(ans_path, os.path.join(path_prefix, 'tests', t.ans_name()))
 
         if args['statement']:
             print('Uploading statement.xml')
@@ -655,12 +1513,16 @@ def main():
     cfg = misc.Config()
 
     parser = argparse.ArgumentParser()
+    parser.add_argument('-j', '--build-jobs', type=int, help='Number of parallel compilations (CPU count by default)')
     subparsers = parser.add_subparsers(help='sub-command help')
 
     # (build) build tests
     parser_build = subparsers.add_parser('build', help='build tests and gen answers')
     parser_build.add_argument('main_solution', nargs='?', help='model solution for answers')
     parser_build.add_argument('--ml', type=float, help='Memory limit for solution')
+    parser_build.add_argument('-i', '--incremental', action='store_true',
+                              help='rebuild only what changed since the last build')
+    parser_build.add_argument('--compress', choices=['gz', 'zst'], help='compress tests (01.gz, 01.a.gz, ...)')
     parser_build.set_defaults(func=build_tests)
 
     # (check) check solution
@@ -668,12 +1530,23 @@ def main():
     parser_check.add_argument('solution', nargs='?', help='path to solution for check')
     parser_check.add_argument('--tl', type=float, help='Time limit for solution')
     parser_check.add_argument('--ml', type=float, help='Memory limit for solution')
+    parser_check.add_argument('--jobs', type=int, default=1, help='number of tests running at once')
+    parser_check.add_argument('--fail-fast', action='store_true',
+                              help='run tests failed last time first and stop at the first failed test')
+    parser_check.add_argument('--force', action='store_true', help='run all tests even if their verdicts are cached')
+    parser_check.add_argument('--json', help='path of JSON report (tmp/log/<solution>.json by default)')
+    parser_check.add_argument('--junit', help='path of JUnit XML report')
+    parser_check.add_argument('--repeat', type=int, metavar='K',
+                              help='run every passed test K more times and report time statistics')
     parser_check.set_defaults(func=check_solution)
 
     # (check_all) check all solutions
     parser_check_all = subparsers.add_parser('check_all', help='check all solutions')
     parser_check_all.add_argument('--tl', type=float, help='Time limit for solution')
     parser_check_all.add_argument('--ml', type=float, help='Memory limit for solution')
+    parser_check_all.add_argument('--jobs', type=int, default=1, help='number of tests running at once')
+    parser_check_all.add_argument('--force', action='store_true',
+                                  help='run all tests even if their verdicts are cached')
     parser_check_all.set_defaults(func=check_all_solutions)
 
     # (validate )validate tests
@@ -684,10 +1557,24 @@ def main():
     parser_stress = subparsers.add_parser('stress', help='stress testing')
     parser_stress.add_argument('solution', help='path to solution for check')
     parser_stress.add_argument('model_solution', nargs='?', help='model solution for answers')
+    parser_stress.add_argument('--also', action='append', metavar='SOL',
+                               help='one more solution checked on the same tests, can be repeated')
     parser_stress.add_argument('-n', '--num', type=int, help='number of tests')
     parser_stress.add_argument('--mtl', type=float, help='Time limit for model solution')
     parser_stress.add_argument('--tl', type=float, help='Time limit for user solution')
     parser_stress.add_argument('--ml', type=int, help='Memory limit for solutions')
+    parser_stress.add_argument('--jobs', type=int, default=1, help='number of tests running at once')
+    parser_stress.add_argument('--seed', type=int, help='master seed of tests (random by default)')
+    parser_stress.add_argument('--batch', type=int, metavar='COUNT',
+                               help='run generator as \'gen 3 <seed> COUNT\' to write COUNT tests (1, 2, ...) at '
+                                    'once, .seed of a failed test has the generator run and the number of the test')
+    parser_stress.add_argument('--hunt-tl', action='store_true',
+                               help='search for inputs on which the solution is the slowest instead of checking it')
+    parser_stress.add_argument('--gen-params', help='upper bounds of numeric generator params passed after '
+                                                    'the seed while hunting, like "100000 1000000000"')
+    parser_stress.add_argument('--in-memory', action='store_true',
+                               help='keep scratch files in {0}, only failed tests are written '
+                                    'to disk'.format(MEMORY_FS))
     parser_stress.set_defaults(func=stress_test)
 
     # (build_st) build statement.xml
@@ -735,6 +1622,8 @@ def main():
     parser_add_contest.set_defaults(func=add_contest)
 
     in_args = parser.parse_args()
+    if in_args.build_jobs:
+        executable.scheduler.set_jobs(in_args.build_jobs)
     if in_args.__contains__('func'):
         in_args.func(vars(in_args))
     else:
@@ -0,0 +1,71 @@
+import json
+import os
+from xml.etree import ElementTree
+
+__author__ = 'ksg'
+
+REPORT_VERSION = 1
+
+
+def make_report(solution, date, tl, ml, test_results):
+    """report of a single check, test_results are pairs of Test and TestResult"""
+    tests = []
+    for t, res in test_results:
+        sol_res = res.sol_res
+        tests.append({
+            'test': t.test_num_as_str(),
+            'verdict': res.status,
+            'message': res.msg,
+            'time': res.time,
+            'cpu_time': sol_res.cpu_time if sol_res is not None else None,
+            'max_rss': sol_res.max_rss if sol_res is not None else None,  # in KB
+            'output_size': res.output_size,
+            'cached': res.cached,
+            'timings': res.timings,
+        })
+    return {
+        'version': REPORT_VERSION,
+        'solution': solution,
+        'date': date.isoformat(),
+        'tl': tl,
+        'ml': ml,
+        'passed': sum(1 for x in tests if x['verdict'] == 'OK'),
+        'tests': tests,
+    }
+
+
+def write_json(report, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def write_junit(report, path):
+    """writes report as JUnit XML, every test is a test case of the solution test suite"""
+    tests = report['tests']
+    suite = ElementTree.Element('testsuite', {
+        'name': report['solution'],
+        'tests': str(len(tests)),
+        'failures': str(sum(1 for x in tests if x['verdict'] != 'OK')),
+        'time': '{0:.3f}'.format(sum(x['time'] for x in tests)),
+        'timestamp': report['date'],
+    })
+    for x in tests:
+        case = ElementTree.SubElement(suite, 'testcase', {
+            'classname': report['solution'],
+            'name': 'test {0}'.format(x['test']),
+            'time': '{0:.3f}'.format(x['time']),
+        })
+        if x['verdict'] != 'OK':
+            failure = ElementTree.SubElement(case, 'failure', {'type': x['verdict'], 'message': x['message']})
+            failure.text = x['message']
+
+        properties = ElementTree.SubElement(case, 'properties')
+        for name in ('cpu_time', 'max_rss', 'output_size'):
+            if x[name] is not None:
+                ElementTree.SubElement(properties, 'property', {'name': name, 'value': str(x[name])})
+
+    root = ElementTree.Element('testsuites')
+    root.append(suite)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    ElementTree.ElementTree(root).write(path, encoding='utf-8', xml_declaration=True)
@@ -0,0 +1,3 @@
+import sys
+
+sys.exit(sys.flags.no_site * 10 + sys.flags.ignore_environment)
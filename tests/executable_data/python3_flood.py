@@ -0,0 +1,6 @@
+import sys
+
+chunk = b'\xff' + b'x' * (1024 * 1024 - 1)
+for i in range(int(sys.argv[1])):
+    sys.stdout.buffer.write(chunk)
+    sys.stderr.buffer.write(chunk)
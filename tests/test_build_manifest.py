@@ -0,0 +1,48 @@
+from unittest import TestCase
+import os
+import tempfile
+
+from olymper.build_manifest import BuildManifest
+
+__author__ = 'ksg'
+
+
+class TestBuildManifest(TestCase):
+    def setUp(self):
+        self.saved_path = os.getcwd()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tempdir.name)
+
+    def tearDown(self):
+        os.chdir(self.saved_path)
+        self.tempdir.cleanup()
+
+    def test_save_and_load(self):
+        manifest = BuildManifest()
+        manifest.gen_key = 'gen'
+        manifest.update_inputs({'01': 'a', '02': 'b'})
+        manifest.get_test('01')['solution'] = 'sol'
+        manifest.save()
+
+        manifest = BuildManifest()
+        self.assertEqual(manifest.gen_key, 'gen')
+        self.assertEqual(manifest.get_inputs(), {'01': 'a', '02': 'b'})
+        self.assertEqual(manifest.get_test('01')['solution'], 'sol')
+
+    def test_changed_input_is_forgotten(self):
+        manifest = BuildManifest()
+        manifest.update_inputs({'01': 'a', '02': 'b', '03': 'c'})
+        manifest.get_test('01')['validator'] = 'val'
+        manifest.get_test('02')['validator'] = 'val'
+
+        manifest.update_inputs({'01': 'a', '02': 'changed'})
+        self.assertEqual(manifest.get_test('01')['validator'], 'val')
+        self.assertNotIn('validator', manifest.get_test('02'))
+        self.assertEqual(sorted(manifest.get_inputs()), ['01', '02'])
+
+    def test_broken_manifest(self):
+        os.mkdir('tmp')
+        with open(os.path.join('tmp', 'build_manifest.json'), 'w') as f:
+            f.write('{')
+        self.assertIsNone(BuildManifest().gen_key)
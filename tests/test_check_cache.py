@@ -0,0 +1,82 @@
+from unittest import TestCase
+import collections
+import concurrent.futures
+import os
+import tempfile
+
+from olymper import check_cache
+from olymper.check_cache import FailureHistory
+from olymper.check_cache import VerdictCache
+from olymper.check_cache import get_verdict_key
+from olymper.executable import ExecResult
+
+__author__ = 'ksg'
+
+FakeTest = collections.namedtuple('FakeTest', ['name'])
+FakeTest.inf_name = lambda self: self.name
+
+
+class TestFailureHistory(TestCase):
+    def setUp(self):
+        self.saved_path = os.getcwd()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tempdir.name)
+
+    def tearDown(self):
+        os.chdir(self.saved_path)
+        self.tempdir.cleanup()
+
+    def test_failed_tests_go_first(self):
+        history = FailureHistory()
+        history.update('sol', {'01': True, '02': True, '03': False})
+        history.save()
+
+        tests = [FakeTest(name) for name in ('01', '02', '03')]
+        ordered = FailureHistory().order_tests('sol', tests)
+        self.assertEqual([t.name for t in ordered], ['03', '01', '02'])
+        self.assertEqual(FailureHistory().order_tests('other', tests), tests)
+
+    def test_not_run_tests_keep_state(self):
+        history = FailureHistory()
+        history.update('sol', {'01': False, '02': False})
+        history.update('sol', {'01': True})
+        self.assertEqual(history.get_failed('sol'), {'02'})
+
+
+class TestVerdictCache(TestCase):
+    def setUp(self):
+        self.saved_path = os.getcwd()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tempdir.name)
+
+    def tearDown(self):
+        os.chdir(self.saved_path)
+        self.tempdir.cleanup()
+
+    def test_key_depends_on_limits(self):
+        self.assertEqual(get_verdict_key('sol', 'test', 1.0, 256), get_verdict_key('sol', 'test', 1.0, 256))
+        self.assertNotEqual(get_verdict_key('sol', 'test', 1.0, 256), get_verdict_key('sol', 'test', 2.0, 256))
+
+    def test_put_and_get(self):
+        cache = VerdictCache()
+        self.assertIsNone(cache.get('key'))
+        sol_res = ExecResult(0, 0.5, b'', None, 0.25, 0.125, 1024)
+        cache.put('key', check_cache.TestResult(1, 'OK', 'ok', 0.5, sol_res, 10))
+        cache.put('tl', check_cache.TestResult(0, 'TL', 'Time-limit error'))
+        cache.save()
+
+        res = VerdictCache().get('key')
+        self.assertEqual((res.score, res.status, res.msg, res.time, res.output_size), (1, 'OK', 'ok', 0.5, 10))
+        self.assertTrue(res.cached)
+        self.assertEqual(res.sol_res.cpu_time, 0.375)
+        self.assertEqual(res.sol_res.max_rss, 1024)
+        self.assertEqual(VerdictCache().get('tl').status, 'TL')
+
+    def test_verdicts_from_threads(self):
+        verdicts = VerdictCache()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda i: verdicts.put(str(i), check_cache.TestResult(1, 'OK', 'OK')), range(1000)))
+        verdicts.save()
+        self.assertEqual(len(VerdictCache().data), 1000)
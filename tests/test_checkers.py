@@ -0,0 +1,51 @@
+from unittest import TestCase
+import os
+import tempfile
+
+from olymper.checkers import BuiltinChecker
+
+__author__ = 'ksg'
+
+
+class TestBuiltinChecker(TestCase):
+    def setUp(self):
+        self.saved_path = os.getcwd()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tempdir.name)
+
+    def tearDown(self):
+        os.chdir(self.saved_path)
+        self.tempdir.cleanup()
+
+    def check(self, spec, out, ans):
+        for name, content in (('out', out), ('ans', ans)):
+            with open(name, 'w') as f:
+                f.write(content)
+        return BuiltinChecker(spec).execute(args=['inf', 'out', 'ans'])
+
+    def test_tokens(self):
+        self.assertEqual(self.check('builtin:tokens', '1  2\n3\n', '1 2 3').returncode, 0)
+        res = self.check('builtin:tokens', '1 2 4', '1 2 3')
+        self.assertEqual(res.returncode, 1)
+        self.assertEqual(res.stderr, 'wrong answer 3rd tokens differ - expected: \'3\', found: \'4\'')
+        self.assertEqual(self.check('builtin:tokens', '', '1').returncode, 1)
+        self.assertEqual(self.check('builtin:tokens', '1 2', '1').returncode, 1)
+
+    def test_lines(self):
+        self.assertEqual(self.check('builtin:lines', '1 2 \n3\n\n', '1 2\n3').returncode, 0)
+        self.assertEqual(self.check('builtin:lines', '1\n2 3', '1 2\n3').returncode, 1)
+
+    def test_double(self):
+        self.assertEqual(self.check('builtin:double', '1.0000001 2', '1 2').returncode, 0)
+        self.assertEqual(self.check('builtin:double:1e-9', '1.0000001 2', '1 2').returncode, 1)
+        self.assertEqual(self.check('builtin:double', '1 abc', '1 2').returncode, 2)
+
+    def test_missing_output(self):
+        with open('ans', 'w') as f:
+            f.write('1')
+        self.assertEqual(BuiltinChecker('builtin:tokens').execute(args=['inf', 'out', 'ans']).returncode, 3)
+
+    def test_unknown_checker(self):
+        with self.assertRaises(Exception):
+            BuiltinChecker('builtin:unknown')
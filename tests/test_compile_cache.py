@@ -0,0 +1,71 @@
+from unittest import TestCase
+import os
+import tempfile
+import time
+
+from olymper import compile_cache
+from olymper.compile_cache import CompileCache
+
+__author__ = 'ksg'
+
+
+class TestCompileCache(TestCase):
+    def setUp(self):
+        self.saved_path = os.getcwd()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tempdir.name)
+
+    def tearDown(self):
+        os.chdir(self.saved_path)
+        self.tempdir.cleanup()
+
+    def write_file(self, name, content):
+        with open(name, 'w') as f:
+            f.write(content)
+
+    def test_key_depends_on_flags_and_version(self):
+        self.write_file('sol.cpp', 'int main() {}')
+        key = compile_cache.get_key('sol.cpp', 'C++', '-O2', 'g++ 1.0')
+        self.assertEqual(key, compile_cache.get_key('sol.cpp', 'C++', '-O2', 'g++ 1.0'))
+        self.assertNotEqual(key, compile_cache.get_key('sol.cpp', 'C++', '-O0', 'g++ 1.0'))
+        self.assertNotEqual(key, compile_cache.get_key('sol.cpp', 'C++', '-O2', 'g++ 2.0'))
+
+    def test_key_depends_on_headers(self):
+        self.write_file('sol.cpp', 'int main() {}')
+        os.mkdir('lib')
+        self.write_file(os.path.join('lib', 'testlib.h'), '// v1')
+        key = compile_cache.get_key('sol.cpp', 'C++', '', '', ['lib'])
+        self.write_file(os.path.join('lib', 'testlib.h'), '// v2')
+        self.assertNotEqual(key, compile_cache.get_key('sol.cpp', 'C++', '', '', ['lib']))
+
+    def test_store_and_fetch(self):
+        cache = CompileCache('cache')
+        self.write_file('binary', 'content')
+        self.assertFalse(cache.fetch('abcdef', 'copy'))
+
+        cache.store('abcdef', 'binary')
+        self.assertTrue(cache.fetch('abcdef', 'copy'))
+        with open('copy') as f:
+            self.assertEqual(f.read(), 'content')
+
+    def test_store_folder(self):
+        cache = CompileCache('cache')
+        os.mkdir('classes')
+        self.write_file(os.path.join('classes', 'Main.class'), 'content')
+
+        cache.store('abcdef', 'classes')
+        self.assertTrue(cache.fetch('abcdef', 'copy'))
+        self.assertTrue(os.path.exists(os.path.join('copy', 'Main.class')))
+
+    def test_eviction(self):
+        cache = CompileCache('cache', max_size=1)
+        self.write_file('binary', 'x' * 600 * 1024)
+
+        cache.store('aaaaaa', 'binary')
+        old_time = time.time() - 100
+        os.utime(cache.entry_path('aaaaaa'), (old_time, old_time))
+        cache.store('bbbbbb', 'binary')
+
+        self.assertFalse(os.path.exists(cache.entry_path('aaaaaa')))
+        self.assertTrue(os.path.exists(cache.entry_path('bbbbbb')))
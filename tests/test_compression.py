@@ -0,0 +1,93 @@
+from unittest import TestCase
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from olymper import compression
+from olymper.build_manifest import hash_test_file
+
+__author__ = 'ksg'
+
+
+class TestCompression(TestCase):
+    def setUp(self):
+        self.saved_path = os.getcwd()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tempdir.name)
+
+        self.data = b''.join(b'%d\n' % i for i in range(200000))
+        with open('01', 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        os.chdir(self.saved_path)
+        self.tempdir.cleanup()
+
+    def test_compress_and_read(self):
+        path = compression.compress_file('01', '.gz')
+        self.assertEqual(path, '01.gz')
+        self.assertFalse(os.path.exists('01'))
+        self.assertEqual(compression.find_file('01'), '01.gz')
+        with compression.open_read(path) as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_same_content_same_file(self):
+        shutil.copy('01', '02')
+        compression.compress_file('01', '.gz')
+        compression.compress_file('02', '.gz')
+        with open('01.gz', 'rb') as f1, open('02.gz', 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_hash_does_not_depend_on_compression(self):
+        plain_hash = hash_test_file('01')
+        self.assertEqual(hash_test_file(compression.compress_file('01', '.gz')), plain_hash)
+
+    def test_stdin(self):
+        path = compression.compress_file('01', '.gz')
+        with compression.open_stdin(path) as f:
+            res = subprocess.run([sys.executable, '-c', 'import sys; print(len(sys.stdin.buffer.read()))'],
+                                 stdin=f, stdout=subprocess.PIPE)
+        self.assertEqual(int(res.stdout), len(self.data))
+
+    def test_stdin_not_read(self):
+        path = compression.compress_file('01', '.gz')
+        with compression.open_stdin(path) as f:
+            res = subprocess.run([sys.executable, '-c', 'pass'], stdin=f)
+        self.assertEqual(res.returncode, 0)
+
+    def test_files_equal(self):
+        shutil.copy('01', 'out')
+        path = compression.compress_file('01', '.gz')
+        self.assertTrue(compression.files_equal('out', path))
+        with open('out', 'ab') as f:
+            f.write(b'1')
+        self.assertFalse(compression.files_equal('out', path))
+        with open('out', 'wb') as f:
+            f.write(self.data[:-1])
+        self.assertFalse(compression.files_equal('out', path))
+
+    def test_plain_file(self):
+        path = compression.compress_file('01', '.gz')
+        with compression.plain_file(path, 'tmp/01') as plain_path:
+            self.assertEqual(plain_path, 'tmp/01')
+            with open(plain_path, 'rb') as f:
+                self.assertEqual(f.read(), self.data)
+        self.assertFalse(os.path.exists('tmp/01'))
+
+    def test_pipe_file(self):
+        path = compression.compress_file('01', '.gz')
+        with compression.pipe_file(path, 'tmp/01') as (pipe_path, fds):
+            res = subprocess.run([sys.executable, '-c', 'import sys; print(len(open(sys.argv[1], "rb").read()))',
+                                  pipe_path], stdout=subprocess.PIPE, pass_fds=fds)
+        self.assertEqual(int(res.stdout), len(self.data))
+        self.assertFalse(os.path.exists('tmp/01'))
+
+    def test_zstd(self):
+        if compression.zstandard is None and shutil.which('zstd') is None:
+            self.skipTest('zstd is not installed')
+        path = compression.compress_file('01', '.zst')
+        with compression.open_read(path) as f:
+            self.assertEqual(f.read(), self.data)
@@ -5,6 +5,7 @@ import tempfile
 import os
 
 from misc import Config
+from misc import parse_flag
 
 __author__ = 'ksg'
 
@@ -85,6 +86,12 @@ class TestConfig(TestCase):
             self.assertFalse(cfg.get_problem_param('use_doall'))
             self.assertFalse(cfg.get_problem_param('qwerty'))
 
+    def test_parse_flag(self):
+        for value in ('false', 'False', '0', 'no', 'off', '', False, 0):
+            self.assertFalse(parse_flag(value), value)
+        for value in ('true', '1', 'yes', True, 1):
+            self.assertTrue(parse_flag(value), value)
+
     def test_get_not_existing_problem_param_ini(self):
         with self.unpack_named_src('problem.conf') as conf_file:
             cfg = Config()
@@ -6,6 +6,7 @@ import unittest
 import os
 import tempfile
 
+from olymper.executable import BuildScheduler
 from olymper.executable import Executable
 
 __author__ = 'ksg'
@@ -88,6 +89,38 @@ class TestExecutable(TestCase):
         self.assertEqual(exec_res.stderr, 'stderr example')
         self.assertEqual(exec_res.returncode, 4)
 
+    def test_python_syntax_error(self):
+        src_name = 'python3_syntax_error.py'
+        with self.unpack_src(src_name) as src_file:
+            executable = Executable(src_file.name, src_name, lang='Python3',
+                                    use_precompiled=False, save_compiled=False)
+
+            with self.assertRaises(Exception) as cm:
+                executable.finish_compilation()
+        self.assertTrue(cm.exception.args[0].startswith('Compilation error'))
+
+    def test_python_sibling_import(self):
+        os.mkdir('sol')
+        with open(os.path.join('sol', 'helper.py'), 'w') as f:
+            f.write('CODE = 7\n')
+        with open(os.path.join('sol', 'sol.py'), 'w') as f:
+            f.write('import sys\nimport helper\nprint(__name__, __file__, sys.argv[1:])\nsys.exit(helper.CODE)\n')
+        executable = Executable(os.path.join('sol', 'sol.py'), 'sol.py', lang='Python3',
+                                use_precompiled=False, save_compiled=False)
+
+        exec_res = executable.execute(stdout=subprocess.PIPE, args='x')
+        self.assertEqual(exec_res.returncode, 7)
+        self.assertEqual(exec_res.stdout, '__main__ {0} [\'x\']'.format(os.path.join('sol', 'sol.py')))
+
+    def test_python_interpreter_flags(self):
+        src_name = 'python3_flags.py'
+        with self.unpack_src(src_name) as src_file:
+            executable = Executable(src_file.name, src_name, lang='Python3', interpreter_flags='-S -E',
+                                    use_precompiled=False, save_compiled=False)
+
+            exec_res = executable.execute()
+        self.assertEqual(exec_res.returncode, 11)
+
     # tests manual compilation finishing for not compilable languages (like Python)
     def test_manual_compilation_finishing_1(self):
         src_name = 'python3_exit0.py'
@@ -159,6 +192,18 @@ class TestExecutable(TestCase):
             exec_res = executable.execute()
         self.assertEqual(exec_res.returncode, 0)
 
+    @unittest.skipUnless(sys.platform.startswith("linux"), "requires Linux")
+    def test_execution_resource_usage(self):
+        src_name = 'cpp_ml_200.cpp'
+        with self.unpack_src(src_name) as src_file:
+            executable = Executable(src_file.name, src_name, lang='C++', ml=230,
+                                    use_precompiled=False, save_compiled=False)
+
+            exec_res = executable.execute(stdout=subprocess.PIPE)
+        self.assertGreater(exec_res.max_rss, 190 * 1024)
+        self.assertGreater(exec_res.cpu_time, 0)
+        self.assertGreaterEqual(exec_res.exec_time, exec_res.user_time)
+
     def test_execution_args_1(self):
         src_name = 'python3_args.py'
         with self.unpack_src(src_name) as src_file:
@@ -177,6 +222,61 @@ class TestExecutable(TestCase):
             exec_res = executable.execute(args='42 58')
         self.assertEqual(exec_res.returncode, 100)
 
+    def test_execution_args_quoted(self):
+        src_name = 'python3_args.py'
+        with self.unpack_src(src_name) as src_file:
+            executable = Executable(src_file.name, src_name, lang='Python',
+                                    use_precompiled=False, save_compiled=False)
+
+            exec_res = executable.execute(args='"40" 2')
+            exec_list_res = executable.execute(args=['40', '3'])
+        self.assertEqual(exec_res.returncode, 42)
+        self.assertEqual(exec_list_res.returncode, 43)
+
+    def test_execution_bounded_capture(self):
+        src_name = 'python3_flood.py'
+        with self.unpack_src(src_name) as src_file:
+            executable = Executable(src_file.name, src_name, lang='Python', capture_limit=1024,
+                                    use_precompiled=False, save_compiled=False)
+
+            exec_res = executable.execute(stdout=subprocess.PIPE, stderr=subprocess.PIPE, args='3')
+        self.assertEqual(exec_res.returncode, 0)
+        self.assertFalse(exec_res.output_limit_exceeded)
+        self.assertLess(len(exec_res.stdout_data), 4 * 1024)
+        self.assertIn('bytes skipped', exec_res.stderr)  # invalid UTF-8 is replaced
+
+    def test_execution_output_limit_pipe(self):
+        src_name = 'python3_flood.py'
+        with self.unpack_src(src_name) as src_file:
+            executable = Executable(src_file.name, src_name, lang='Python', output_limit=1,
+                                    use_precompiled=False, save_compiled=False)
+
+            exec_res = executable.execute(stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, args='1000')
+        self.assertTrue(exec_res.output_limit_exceeded)
+
+    def test_execution_output_limit_file(self):
+        src_name = 'python3_flood.py'
+        with self.unpack_src(src_name) as src_file:
+            executable = Executable(src_file.name, src_name, lang='Python', output_limit=1,
+                                    use_precompiled=False, save_compiled=False)
+
+            with open('out.txt', 'w') as ouf:
+                exec_res = executable.execute(stdout=ouf, stderr=subprocess.DEVNULL, args='1000')
+        self.assertTrue(exec_res.output_limit_exceeded)
+        self.assertLessEqual(os.path.getsize('out.txt'), 1024 ** 2 + 1)  # one byte over the limit is written
+
+    def test_execution_output_limit_boundary(self):
+        src_name = 'python3_flood.py'
+        with self.unpack_src(src_name) as src_file:
+            executable = Executable(src_file.name, src_name, lang='Python', output_limit=1,
+                                    use_precompiled=False, save_compiled=False)
+
+            with open('out.txt', 'w') as ouf:
+                exec_res = executable.execute(stdout=ouf, stderr=subprocess.DEVNULL, args='1')
+        self.assertFalse(exec_res.output_limit_exceeded)
+        self.assertEqual(exec_res.returncode, 0)
+        self.assertEqual(os.path.getsize('out.txt'), 1024 ** 2)
+
     def test_work_dir_changing_python3(self):
         tempdir = tempfile.TemporaryDirectory()
 
@@ -201,6 +301,62 @@ class TestExecutable(TestCase):
 
         self.assertEqual(exec_res.returncode, 0)
 
+    def test_compile_cache_cpp(self):
+        src_name = 'cpp_exit0.cpp'
+        os.environ['OLYMPER_CACHE_DIR'] = os.path.abspath('cache')
+        try:
+            with self.unpack_src(src_name) as src_file:
+                executable = Executable(src_file.name, src_name, lang='C++')
+                executable.finish_compilation()
+                os.remove(executable.exec_out)
+
+                cached = Executable(src_file.name, src_name, lang='C++')
+                self.assertTrue(cached.compiled)  # taken from cache, compiler wasn't started
+                exec_res = cached.execute()
+
+                other_flags = Executable(src_file.name, src_name, lang='C++', compiler_flags='-O0 -xc++')
+                self.assertFalse(other_flags.compiled)
+                other_flags.finish_compilation()
+        finally:
+            del os.environ['OLYMPER_CACHE_DIR']
+
+        self.assertEqual(exec_res.returncode, 0)
+        self.assertNotEqual(executable.exec_out, other_flags.exec_out)
+
+    def test_build_scheduler_deduplication(self):
+        src_name = 'cpp_exit0.cpp'
+        build_scheduler = BuildScheduler(jobs=2)
+        with self.unpack_src(src_name) as src_file:
+            first = Executable(src_file.name, src_name, lang='C++', save_compiled=False,
+                               build_scheduler=build_scheduler)
+            second = Executable(src_file.name, src_name, lang='C++', save_compiled=False,
+                                build_scheduler=build_scheduler)
+            self.assertIs(first.compile_future, second.compile_future)
+
+            second.finish_compilation()
+            exec_res = first.execute()
+        self.assertEqual(exec_res.returncode, 0)
+
+    def test_testlib_precompiled_header(self):
+        os.makedirs(os.path.join('lib'))
+        os.makedirs(os.path.join('problems', 'p'))
+        with open(os.path.join('lib', 'testlib.h'), 'wb') as f:
+            f.write(pkgutil.get_data('olymper', os.path.join('data', 'testlib.h')))
+        os.chdir(os.path.join('problems', 'p'))
+        with open('checker.cpp', 'w') as f:
+            f.write('#include "testlib.h"\nint main(int argc, char* argv[]) { return 0; }\n')
+
+        os.environ['OLYMPER_CACHE_DIR'] = os.path.abspath('cache')
+        try:
+            executable = Executable('checker.cpp', 'checker', True, save_compiled=False)
+            exec_res = executable.execute()
+            pch_cache, pch_key = executable.pch[:2]
+        finally:
+            del os.environ['OLYMPER_CACHE_DIR']
+
+        self.assertEqual(exec_res.returncode, 0)
+        self.assertTrue(os.path.exists(os.path.join(pch_cache.entry_path(pch_key), 'testlib.h.gch')))
+
     # @unittest.skip('')
     # def test_start_compilation(self):
     # self.fail()
@@ -0,0 +1,71 @@
+from unittest import TestCase
+import os
+import shutil
+import unittest
+import tempfile
+
+from olymper import limits
+
+__author__ = 'ksg'
+
+
+class TestLimits(TestCase):
+    def setUp(self):
+        self.saved_path = os.getcwd()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tempdir.name)
+        limits._cgroup_root = None
+
+    def tearDown(self):
+        os.chdir(self.saved_path)
+        self.tempdir.cleanup()
+        limits._cgroup_root = None
+        os.environ.pop('OLYMPER_CGROUP', None)
+
+    def test_rlimit_backend(self):
+        self.assertIsInstance(limits.get_backend('rlimit'), limits.RlimitBackend)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            limits.get_backend('qwerty')
+
+    def test_java_has_no_rlimit(self):
+        run = limits.get_backend('rlimit').create_run(256, 'Java')
+        self.assertIsNone(run.get_preexec_fn())
+        self.assertIsNone(run.finish())
+
+    @unittest.skipUnless(shutil.which('prlimit'), 'requires prlimit')
+    def test_rlimit_wrapper(self):
+        run = limits.get_backend('rlimit').create_run(256, 'C++')
+        self.assertEqual(run.get_wrapper()[1:], ['--as={0}:'.format(256 * 1024 ** 2), '--'])
+        self.assertIsNone(run.get_preexec_fn())
+
+    def test_cgroup_without_memory_controller(self):
+        with open('cgroup.subtree_control', 'w') as f:
+            f.write('cpu pids\n')
+        os.environ['OLYMPER_CGROUP'] = os.getcwd()
+        self.assertFalse(limits.is_cgroup_usable(os.getcwd()))
+
+    def test_delegated_cgroup(self):
+        with open('cgroup.subtree_control', 'w') as f:
+            f.write('cpu memory pids\n')
+        os.environ['OLYMPER_CGROUP'] = os.getcwd()
+        backend = limits.get_backend('auto')
+        self.assertIsInstance(backend, limits.CgroupBackend)
+        self.assertEqual(backend.root, os.getcwd())
+
+    def test_cgroup_folder(self):
+        mounts = [line.split() for line in (
+            '22 1 0:21 / /proc rw,nosuid - proc proc rw',
+            '30 22 0:26 / /sys/fs/cgroup rw,nosuid - cgroup2 cgroup2 rw',
+        )]
+        self.assertEqual(limits.get_cgroup_folder('/user.slice/olymp', mounts), '/sys/fs/cgroup/user.slice/olymp')
+        self.assertEqual(limits.get_cgroup_folder('/', mounts), '/sys/fs/cgroup')
+
+    def test_cgroup_folder_with_mount_root(self):
+        mounts = [line.split() for line in (
+            '30 22 0:26 /docker/abc /sys/fs/cgroup rw,nosuid - cgroup2 cgroup2 rw',
+        )]
+        self.assertEqual(limits.get_cgroup_folder('/docker/abc/job', mounts), '/sys/fs/cgroup/job')
+        self.assertIsNone(limits.get_cgroup_folder('/other', mounts))
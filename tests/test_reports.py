@@ -0,0 +1,51 @@
+from unittest import TestCase
+from xml.etree import ElementTree
+import collections
+import datetime
+import json
+import os
+import tempfile
+
+from olymper import check_cache
+from olymper import reports
+from olymper.executable import ExecResult
+
+__author__ = 'ksg'
+
+FakeTest = collections.namedtuple('FakeTest', ['name'])
+FakeTest.test_num_as_str = lambda self: self.name
+
+
+class TestReports(TestCase):
+    def setUp(self):
+        self.saved_path = os.getcwd()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tempdir.name)
+
+        sol_res = ExecResult(0, 0.5, None, None, 0.25, 0.25, 1024)
+        self.report = reports.make_report('sol.cpp', datetime.datetime(2020, 1, 1), 1.0, 256, [
+            (FakeTest('01'), check_cache.TestResult(1, 'OK', 'ok', 0.5, sol_res, 10)),
+            (FakeTest('02'), check_cache.TestResult(0, 'TL', 'Time-limit error (1.0 s.)', 1.0)),
+        ])
+
+    def tearDown(self):
+        os.chdir(self.saved_path)
+        self.tempdir.cleanup()
+
+    def test_json(self):
+        reports.write_json(self.report, os.path.join('log', 'report.json'))
+        with open(os.path.join('log', 'report.json')) as f:
+            report = json.load(f)
+        self.assertEqual(report['passed'], 1)
+        self.assertEqual(report['tests'][0]['cpu_time'], 0.5)
+        self.assertEqual(report['tests'][0]['output_size'], 10)
+        self.assertEqual(report['tests'][1]['verdict'], 'TL')
+
+    def test_junit(self):
+        reports.write_junit(self.report, 'report.xml')
+        suite = ElementTree.parse('report.xml').getroot().find('testsuite')
+        self.assertEqual(suite.get('failures'), '1')
+        cases = suite.findall('testcase')
+        self.assertIsNone(cases[0].find('failure'))
+        self.assertEqual(cases[1].find('failure').get('type'), 'TL')